@@ -0,0 +1,73 @@
+'''
+generates the benchmark grid corpus in benchmarks/grids
+
+every grid is 180 degree symmetric like a real crossword, "open" grids have few blocks
+and "blocky" ones a lot. runs longer than MAX_RUN get broken up, the word lists have
+next to no words that long. seeded, so running it again writes the same files
+
+    python benchmarks/make_grids.py
+'''
+
+import os
+import random
+
+GRID_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "grids")
+
+MAX_RUN = 9
+
+# name: (size, block density, seed)
+GRIDS = {
+    "05x05-open": (5, 0.08, 1),
+    "05x05-blocky": (5, 0.24, 2),
+    "07x07-open": (7, 0.12, 3),
+    "07x07-blocky": (7, 0.26, 4),
+    "09x09-open": (9, 0.14, 5),
+    "09x09-blocky": (9, 0.28, 6),
+    "11x11-open": (11, 0.16, 7),
+    "11x11-blocky": (11, 0.30, 8),
+    "15x15-open": (15, 0.16, 9),
+    "15x15-blocky": (15, 0.30, 10),
+    "21x21-open": (21, 0.18, 11),
+    "21x21-blocky": (21, 0.32, 12),
+}
+
+
+def make_grid(size, density, seed):
+    '''returns the rows of a symmetric grid, "_" open and "#" block'''
+    rnd = random.Random(seed)
+    blocks = [[False] * size for _ in range(size)]
+
+    def place(i, j):
+        blocks[i][j] = True
+        blocks[size - 1 - i][size - 1 - j] = True
+
+    cells = [(i, j) for i in range(size) for j in range(size)]
+    rnd.shuffle(cells)
+    for i, j in cells[:int(density * size * size / 2)]:
+        place(i, j)
+
+    # break up runs that r too long, across then down
+    for transposed in (False, True):
+        for a in range(size):
+            run = 0
+            for b in range(size):
+                i, j = (b, a) if transposed else (a, b)
+                run = 0 if blocks[i][j] else run + 1
+                if run > MAX_RUN:
+                    back = rnd.randrange(2, MAX_RUN - 1)
+                    i, j = (b - back, a) if transposed else (a, b - back)
+                    place(i, j)
+                    run = back
+
+    return ["".join("#" if block else "_" for block in row) for row in blocks]
+
+
+def main():
+    os.makedirs(GRID_DIR, exist_ok=True)
+    for name, (size, density, seed) in GRIDS.items():
+        with open(os.path.join(GRID_DIR, f"{name}.txt"), "w") as file:
+            file.write("\n".join(make_grid(size, density, seed)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
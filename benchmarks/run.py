@@ -0,0 +1,238 @@
+'''
+solver benchmark
+
+measures, for every word list:
+- FastDictionary load time and peak memory of the load
+and for every grid in benchmarks/grids against every word list:
+- time of the initial Solver.ac3
+- backtrack nodes, nodes/sec and time to first solution (None on timeout)
+- peak RSS of the process that solved it (every grid runs in its own forked child)
+
+every grid runs --repeat times and the median of each metric is kept. results go to a
+json file and r compared against a stored baseline: the node count of a solved grid
+(the same on every machine) and a grid that stops being solved fail the run (exit code 1)
+when they get worse than the baseline by more than --threshold percent. times, rates and
+memory depend on the machine and on its load, they get an absolute slack on top of the
+threshold and only fail the run with --gate-timings, otherwise they r printed as warnings
+
+    python benchmarks/run.py                      # run and compare
+    python benchmarks/run.py --update-baseline    # run and store the results as the baseline
+'''
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.dictionary import FastDictionary
+from tests.models import Crossword
+from tests.solver import Solver, SearchCancelled
+
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+GRID_DIR = os.path.join(BENCH_DIR, "grids")
+
+WORD_LISTS = {
+    "words.csv": os.path.join(ROOT, "data", "words.csv"),
+    "global.txt": os.path.join(ROOT, "global.txt"),
+}
+
+# metric name -> (True if a bigger value is better, absolute slack a worse value gets
+# on top of the threshold). nodes is only compared between two solved runs, that count
+# doesn't depend on the machine, so it is the one metric gated by default
+METRICS = {
+    "nodes": (False, 0),
+    "load_time": (False, 0.05),
+    "load_peak_kb": (False, 1024),
+    "ac3_time": (False, 0.05),
+    "nodes_per_sec": (True, 200),
+    "time_to_first_solution": (False, 0.05),
+    "peak_rss_kb": (False, 4096),
+}
+GATED = {"nodes"}
+
+# set before the grid children fork
+_dictionary = None
+
+
+def bench_dictionary(path, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        FastDictionary(path)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    FastDictionary(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"load_time": sorted(times)[len(times) // 2], "load_peak_kb": peak // 1024}
+
+
+def bench_grid(path, timeout):
+    '''runs in a forked child, so ru_maxrss is the peak of this grid alone'''
+    crossword = Crossword(path)
+    solver = Solver(crossword, _dictionary)
+
+    start = time.perf_counter()
+    consistent = solver.ac3()
+    ac3_time = time.perf_counter() - start
+
+    deadline = time.monotonic() + timeout
+    solver.stop_check = lambda: time.monotonic() > deadline
+
+    start = time.perf_counter()
+    status = "unsatisfiable"
+    if consistent:
+        try:
+            if solver.backtrack(dict()) is not None:
+                status = "solved"
+        except SearchCancelled:
+            status = "timeout"
+    search_time = time.perf_counter() - start
+
+    return {
+        "status": status,
+        "variables": len(crossword.variables),
+        "ac3_time": ac3_time,
+        "nodes": solver.nodes,
+        "nodes_per_sec": solver.nodes / search_time if search_time else None,
+        "time_to_first_solution": ac3_time + search_time if status == "solved" else None,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def median_of(runs):
+    '''keeps the median of every metric over repeated runs of one grid'''
+    middle = dict(runs[len(runs) // 2])
+    for metric in METRICS:
+        values = sorted(result[metric] for result in runs if result.get(metric) is not None)
+        if values:
+            middle[metric] = values[len(values) // 2]
+    return middle
+
+
+def run(timeout, word_lists, repeat):
+    global _dictionary
+
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timeout": timeout,
+            "repeat": repeat,
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "dictionaries": {},
+        "grids": {},
+    }
+    context = multiprocessing.get_context("fork")
+    grids = sorted(name for name in os.listdir(GRID_DIR) if name.endswith(".txt"))
+
+    for list_name in word_lists:
+        path = WORD_LISTS[list_name]
+        results["dictionaries"][list_name] = bench_dictionary(path)
+        print(f"{list_name}: {results['dictionaries'][list_name]}", file=sys.stderr)
+
+        _dictionary = FastDictionary(path)
+        for grid in grids:
+            runs = []
+            # a grid that runs into the timeout is measured once, its nodes/sec is
+            # already averaged over the whole timeout
+            while len(runs) < repeat and (not runs or runs[-1]["status"] != "timeout"):
+                with context.Pool(1) as pool:
+                    runs.append(pool.apply(bench_grid, (os.path.join(GRID_DIR, grid), timeout)))
+            result = median_of(runs)
+            key = f"{grid[:-len('.txt')]}@{list_name}"
+            results["grids"][key] = result
+            print(f"{key}: {result['status']} nodes={result['nodes']}", file=sys.stderr)
+        _dictionary = None
+
+    return results
+
+
+def compare(results, baseline, threshold, gated=GATED):
+    '''
+    returns two lists of (entry, metric, baseline value, new value): the regressions of
+    `gated` metrics and status (they fail the run) and those of every other metric
+    '''
+    regressions = []
+    warnings = []
+    sections = [("dictionaries", name) for name in baseline.get("dictionaries", {})]
+    sections += [("grids", name) for name in baseline.get("grids", {})]
+
+    for section, name in sections:
+        old = baseline[section][name]
+        new = results[section].get(name)
+        if new is None:
+            continue
+
+        if old.get("status") == "solved" and new.get("status") != "solved":
+            regressions.append((name, "status", old["status"], new["status"]))
+
+        for metric, (higher_is_better, slack) in METRICS.items():
+            before, after = old.get(metric), new.get(metric)
+            if before is None or after is None:
+                continue
+            if metric == "nodes" and not old.get("status") == new.get("status") == "solved":
+                continue
+            if higher_is_better:
+                worse = after < before * (1 - threshold / 100) - slack
+            else:
+                worse = after > before * (1 + threshold / 100) + slack
+            if worse:
+                (regressions if metric in gated else warnings).append((name, metric, before, after))
+
+    return regressions, warnings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crossword solver benchmark")
+    parser.add_argument("--timeout", type=float, default=2.0, help="seconds of search per grid")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per grid, the median is kept")
+    parser.add_argument("--words", nargs="+", choices=sorted(WORD_LISTS), default=list(WORD_LISTS))
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--threshold", type=float, default=50.0,
+                        help="percent a metric may get worse before the run fails")
+    parser.add_argument("--gate-timings", action="store_true",
+                        help="fail the run on time, rate and memory regressions too, not just nodes")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.timeout, args.words, args.repeat)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, nothing to compare", file=sys.stderr)
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    gated = set(METRICS) if args.gate_timings else GATED
+    regressions, warnings = compare(results, baseline, args.threshold, gated)
+    for name, metric, before, after in warnings:
+        print(f"WARNING {name} {metric}: {before} -> {after}", file=sys.stderr)
+    for name, metric, before, after in regressions:
+        print(f"REGRESSION {name} {metric}: {before} -> {after}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print("No regressions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
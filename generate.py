@@ -1,7 +1,8 @@
 import sys
 
-from crossword import *
+from tests.models import Crossword, Variable
 from tests.dictionary import FastDictionary
+from tests.worklist import ArcQueue
 
 
 class CrosswordCreator():
@@ -10,7 +11,7 @@ class CrosswordCreator():
         """
         Create new CSP crossword generate.
         """
-        self,fast_dict = fast
+        self.fast_dict = fast_dict
         self.crossword = crossword
         self.domains = {
             var: self.crossword.words.copy()
@@ -99,15 +100,20 @@ class CrosswordCreator():
         """
         Update `self.domains` such that each variable is node-consistent.
         (Remove any values that are inconsistent with a variable's unary
-         constraints; in this case, the length of the word.)
+         constraints; in this case, the length of the word and the letters
+         already placed in its cells.)
         """
         #removes words from domain that dont have the same len as the variable length
         # ensures every domain value  satisfies the var's unary constraint
         for key, value in self.domains.items():
+            placed = [
+                (k, self.crossword.letters[cell])
+                for k, cell in enumerate(key.cells) if cell in self.crossword.letters
+            ]
 
             #every value in a var's domain has same no. of letters as var's length
             for word in list(value):
-                if key.length != len(word):
+                if key.length != len(word) or any(word[k] != char for k, char in placed):
                     self.domains[key].remove(word)
         
 
@@ -139,14 +145,15 @@ class CrosswordCreator():
             
             #we ask any words of y's length that have the char_to_check at that y_cord
             # we use a mini req dict created by this {position: character}
-            possible_matches_for_y = self.fast_dict.get_matches(
+            # any_match only answers yes/no, so no set of matches gets built per x_word
+            possible_match_for_y = self.fast_dict.any_match(
                 y.length,
                 {y_cord: char_to_check}
             )
 
             # the pruning
-            # if the engine returns an empty set, it means no word for Y can ever satisfy the constraint created by this specific x_word
-            if not possible_matches_for_y:
+            # if the engine finds no match, it means no word for Y can ever satisfy the constraint created by this specific x_word
+            if not possible_match_for_y:
                 self.domains[x].remove(x_word)
                 revised = True
 
@@ -163,18 +170,18 @@ class CrosswordCreator():
         Return True if arc consistency is enforced and no domains are empty;
         return False if one or more domains end up empty.
         """
+        queue = ArcQueue()
         if arcs is None:
             #begin with ini list of all the arcs in the problem
-            queue = []
             for domain in self.domains:
                 for neighbor in self.crossword.neighbors(domain):
                     if self.crossword.overlaps[domain, neighbor]: #checks and filters constraints
-                        queue.append((domain, neighbor))
+                        queue.push((domain, neighbor))
         else:
-         queue = arcs
+         queue.extend(arcs)
 
         while queue:
-           X, Y = queue.pop(0)
+           X, Y = queue.pop()
            if self.revise(X, Y):
                
                if len(self.domains[X]) == 0:
@@ -182,7 +189,7 @@ class CrosswordCreator():
                
                for neighbor in self.crossword.neighbors(X):
                    if neighbor != Y:   
-                    queue.append((neighbor, X))
+                    queue.push((neighbor, X)) # skipped if (neighbor, X) is alr waiting
         return True  
 
 
@@ -242,27 +249,26 @@ class CrosswordCreator():
         conflicts = dict() #key: var, value: no. of conflicts
         
         #conflicts only occur when 2 vars intersect
-        neighbors = self.crossword.neighbors(var)
+        #only the counts matter, so every unassigned neighbor's domain is counted once per char
+        #at the crossing instead of comparing every value against every neighbor word
+        crossings = []
+        for neighbor in self.crossword.neighbors(var):
+            if neighbor in assignment:
+                #skip assigned neighbors
+                continue
+
+            X, Y = self.crossword.overlaps[var, neighbor]
+            char_counts = dict()
+            for y_val in self.domains[neighbor]:
+                char_counts[y_val[Y]] = char_counts.get(y_val[Y], 0) + 1
+            crossings.append((X, len(self.domains[neighbor]), char_counts))
 
         for x_val in self.domains[var]:
             conflicts[x_val] = 0 #ini counts to 0
 
-            for neighbor in neighbors:
-                if neighbor in assignment:
-                    #skip assigned neighbors
-                    continue
-
-                intersection = self.crossword.overlaps[var, neighbor]
-                if intersection is None:
-                    continue  # no conflicts
-                
-                X, Y = intersection
-
-                for y_val in self.domains[neighbor]:
-                    #check if intersecting neighbors overlap as the same char at the pt
-
-                    if x_val[X] != y_val[Y]:
-                        conflicts[x_val] += 1
+            for X, size, char_counts in crossings:
+                #neighbor words that don't have x_val's char at the intersecting pt conflict
+                conflicts[x_val] += size - char_counts.get(x_val[X], 0)
 
             
         sorted_values = list(sorted(conflicts.items(), key=lambda item: item[1]))
@@ -296,7 +302,7 @@ class CrosswordCreator():
 
         #picking the one wit the highest degree
         for var in small_domains:
-            degree = len(self.crossword.neighbors(var))
+            degree = self.crossword.degree(var) # precomputed, no neighbors() call
             if degree > max_degree:
                 max_degree = degree
                 selected = var
@@ -317,28 +323,60 @@ class CrosswordCreator():
 
         If no assignment is possible, return None.
         """
-        #Checks if assignment is complete or not
-        
-        #base-case
-        if self.assignment_complete(assignment):
-            return assignment
-        
-        var = self.select_unassigned_variable(assignment)
-
-        for value in self.order_domain_values(var, assignment):
-            temp_assignment = assignment.copy()
-            temp_assignment[var] = value
-            if self.consistent((temp_assignment)):
-                result = self.backtrack(temp_assignment)
-                if result is not None:
-                    return result
-        
-        return None
+        # an explicit stack instead of one recursive call per slot: every entry is a var and
+        # the values it has left to try, the assignment is changed in place, not copied
+        assignment = dict(assignment)
+        stack = []
+
+        while True:
+            #base-case
+            if self.assignment_complete(assignment):
+                return assignment
+
+            var = self.select_unassigned_variable(assignment)
+            stack.append((var, iter(self.order_domain_values(var, assignment))))
+
+            #find the next value that fits, going back up the stack when a var runs out
+            while stack:
+                var, values = stack[-1]
+                assignment.pop(var, None)
+                for value in values:
+                    assignment[var] = value
+                    if self.consistent(assignment):
+                        break
+                    del assignment[var]
+                else:
+                    stack.pop()
+                    continue
+                break
+            else:
+                return None
 
 
 
 def main():
 
+    # Check usage
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python generate.py structure words [output]")
+
+    # Parse command-line arguments
+    structure = sys.argv[1]
+    words = sys.argv[2]
+    output = sys.argv[3] if len(sys.argv) == 4 else None
+
+    # Generate crossword
+    crossword = Crossword(structure, words)
+    creator = CrosswordCreator(crossword, FastDictionary())
+    assignment = creator.solve()
+
+    # Print result
+    if assignment is None:
+        print("No solution.")
+    else:
+        creator.print(assignment)
+        if output:
+            creator.save(assignment, output)
 
 
 if __name__ == "__main__":
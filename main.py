@@ -1,11 +1,48 @@
+import argparse
+import json
+import sys
+
 from tests.dictionary import FastDictionary
 from tests.models import Crossword, Variable
 from tests.solver import Solver
+from tests.batch import iter_structure_files, solve_batch
 
 #  ini testing
 if __name__ == '__main__':
-    print("Loading dict engine...")
+    parser = argparse.ArgumentParser(
+        description="Solve crossword structure files, one JSON line per puzzle on stdout"
+    )
+    parser.add_argument("structures", nargs="?",
+                        help="directory of structure files, or - to read paths from stdin")
+    parser.add_argument("--words", nargs="+", default=["data/words.csv"],
+                        help="word lists (word,length csv, word;score or plain, optionally gzipped), merged")
+    parser.add_argument("--index", help="precompiled index file, used instead of --words when it exists")
+    parser.add_argument("--workers", type=int, help="worker processes (default cpu count)")
+    parser.add_argument("--timeout", type=float, help="seconds per puzzle")
+    parser.add_argument("--node-limit", type=int, help="search nodes per puzzle")
+    parser.add_argument("--restarts", choices=("luby", "geometric"),
+                        help="restart the search under this cutoff schedule")
+    parser.add_argument("--probe", type=int, default=0,
+                        help="words tried per failed value probing pass before the search and after "
+                             "every restart (default 0, off)")
+    parser.add_argument("--best", action="store_true",
+                        help="highest scoring fill instead of the first (best found so far on timeout)")
+    args = parser.parse_args()
+
+    print("Loading dict engine...", file=sys.stderr)
 
-    fast_dict = FastDictionary()
+    fast_dict = FastDictionary(args.words, index_file=args.index)
+    if fast_dict.load_stats is not None:
+        stats = fast_dict.load_stats
+        print(f"Loaded {stats['words']} words from {stats['sources']} lists "
+              f"({stats['words_per_sec']:.0f} words/sec)", file=sys.stderr)
 
-    
\ No newline at end of file
+    if args.structures is not None:
+        source = sys.stdin if args.structures == "-" else args.structures
+        results = solve_batch(
+            iter_structure_files(source), fast_dict,
+            workers=args.workers, timeout=args.timeout, node_limit=args.node_limit,
+            restarts=args.restarts, best=args.best, probe_limit=args.probe
+        )
+        for result in results:
+            print(json.dumps(result), flush=True)
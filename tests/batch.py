@@ -0,0 +1,156 @@
+'''
+batch solving: many structure files through one loaded dictionary
+
+the dictionary is loaded once in the parent and handed to the pool workers by fork.
+puzzles r fed to the pool a few at a time (never more than max_pending in flight), and
+results r yielded as each one finishes, so memory stays flat however many files come in
+
+every worker keeps a GridCache (tests/gridcache.py), so files that share a block pattern
+only pay for building the crossword and the initial ac3 once per worker
+'''
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .gridcache import GridCache
+from .models import Crossword
+from .solver import BudgetExhausted, Solver
+
+# set in every worker by _init_worker
+_dictionary = None
+_grid_cache = None
+
+
+def iter_structure_files(source):
+    '''
+    source: a directory (every file in it, sorted) or an iterable of paths
+    (e.g. sys.stdin, one path per line)
+    '''
+    if isinstance(source, (str, os.PathLike)):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if os.path.isfile(path):
+                yield path
+        return
+
+    for line in source:
+        path = line.strip()
+        if path:
+            yield path
+
+
+def letter_grid(crossword, assignment):
+    '''rows of the filled grid as strings, "#" for blocks and " " for cells left empty'''
+    letters = [
+        ["#" if not crossword.structure[i][j] else " " for j in range(crossword.width)]
+        for i in range(crossword.height)
+    ]
+    for variable, word in assignment.items():
+        for (i, j), char in zip(variable.cells, word):
+            letters[i][j] = char
+    return ["".join(row) for row in letters]
+
+
+def _init_worker(fast_dictionary):
+    global _dictionary, _grid_cache
+    _dictionary = fast_dictionary
+    _grid_cache = GridCache(fast_dictionary)
+
+
+def solve_file(path, timeout=None, fast_dictionary=None, node_limit=None, best=False, grid_cache=None,
+               **solver_options):
+    '''
+    solves one structure file and returns the json ready result:
+        file, status ("solved", "unsatisfiable", "timeout", "node_limit" or "error"), grid,
+        assignment (list of {i, j, direction, length, word}), timings (seconds), nodes,
+        and probing (Solver.probe_totals) when probing is on
+
+    best: look for the highest scoring fill (Solver.solve_best) instead of the first one,
+    the result gets its "score" and status "optimal" when it is proven best
+    grid_cache: GridCache to take the crossword and the propagated domains from (the
+    worker's own one when called from solve_batch)
+    '''
+    if fast_dictionary is None:
+        fast_dictionary = _dictionary
+        grid_cache = _grid_cache
+
+    result = {"file": path, "status": None, "grid": None, "assignment": None,
+              "timings": {}, "nodes": 0}
+    start = time.perf_counter()
+    try:
+        if grid_cache is None:
+            solver = Solver(Crossword(path), fast_dictionary, **solver_options)
+        else:
+            solver = grid_cache.solver(path, timeout=timeout, **solver_options)
+        crossword = solver.crossword
+        parsed = time.perf_counter()
+        result["timings"]["parse"] = parsed - start
+
+        remaining = None if timeout is None else max(timeout - (parsed - start), 0)
+        if best:
+            assignment = solver.solve_best(timeout=remaining, node_limit=node_limit)
+            result["score"] = solver.best_score
+        else:
+            assignment = solver.solve(timeout=remaining, node_limit=node_limit)
+        result["status"] = solver.status
+
+        result["timings"]["solve"] = time.perf_counter() - parsed
+        result["nodes"] = solver.nodes
+        if solver.probe_limit != 0:
+            result["probing"] = dict(solver.probe_totals)
+        if assignment is not None:
+            result["grid"] = letter_grid(crossword, assignment)
+            result["assignment"] = [
+                {"i": var.i, "j": var.j, "direction": var.direction,
+                 "length": var.length, "word": assignment[var]}
+                for var in crossword.variable_list
+            ]
+    except BudgetExhausted as stop:
+        # the time ran out building the cache entry, before the search started
+        result["status"] = stop.status
+    except (OSError, ValueError) as error:
+        result["status"] = "error"
+        result["error"] = str(error)
+
+    result["timings"]["total"] = time.perf_counter() - start
+    return result
+
+
+def solve_batch(paths, fast_dictionary, workers=None, timeout=None, max_pending=None, node_limit=None,
+                best=False, **solver_options):
+    '''
+    yields the solve_file() result of every path in `paths`, in the order they finish
+
+    workers: pool size (default cpu count)
+    timeout: seconds per puzzle, a puzzle over it comes back with status "timeout"
+    node_limit: search nodes per puzzle, a puzzle over it comes back with status "node_limit"
+    best: best scoring fill per puzzle instead of the first, see solve_file
+    max_pending: most puzzles submitted at once (default 2 per worker)
+    '''
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if max_pending is None:
+        max_pending = 2 * workers
+
+    paths = iter(paths)
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(fast_dictionary,)) as pool:
+        pending = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(solve_file, path, timeout, None, node_limit, best, **solver_options))
+
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
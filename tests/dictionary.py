@@ -1,71 +1,514 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from .index_file import MappedIndex, is_index_file
+from .utils import mask_from_ids, iter_bits
+from .wordlists import WordListReader, normalise
+
+
 class FastDictionary():
-    def __init__(self, filename = "data/words.csv"):
-        self.all_words = set() #set for every word in the dictionary
-        self.length_index = dict() #keys r ints  vals r set of words
-        self.pattern_index = dict() #nested dictionary , l1 key is word length, l2 key  tuple(index, char)
-        #value is the set of words that fit the specific len and letter at that specific point
-
-        with open(filename , "r") as file:
-            for line in file:
-                word, length = line.strip().split(",")
-                word = word.upper()
-                length = int(length)
 
-                self.all_words.add(word)
-                
-                if length not in self.length_index:
-                    self.length_index[length] = set()
-                    self.length_index[length].add(word)
-
-                if length not in self.pattern_index:
-                    self.pattern_index[length] = dict()
-
-                for i, char in enumerate(word):
-                    key_tuple = (i, char)
-
-                    if (i, char) not in self.pattern_index[length]:
-                        self.pattern_index[length][key_tuple] = set()
-                        self.pattern_index[length][key_tuple].add(word)
-                    else:
-                        self.pattern_index[length][key_tuple].add(word)
-
-                '''Basic idea of pattern_index is thi
-                Imagine looking for a 3 letter word with 'O' in the middle index
-                1. you go to look self,pattern_index[3]
-                2. at that self.crossword.variable's index look up the key (1, 'O')
-                3. U get a set of words like ['DOG', "POT', 'LOT', 'GOD']
-                ]'''
-
-   
+    # score of a word whose list doesn't give one
+    DEFAULT_SCORE = 0
+
+    BACKENDS = ("bitset", "numpy")
+
+    def __init__(self, filename = "data/words.csv", index_file = None, cache_bytes = 64 * 1024 * 1024,
+                 backend = "bitset"):
+        '''
+        filename: word,length csv, word;score list, a plain word list (any of them gzipped),
+        a list of such files (merged, see tests/wordlists.py), or an index file made by
+        tests/index_file.py
+        index_file: optional precompiled index, used instead of parsing `filename` when it exists
+        cache_bytes: memory budget of the pattern cache behind match_mask / get_matches
+        backend: "bitset" (default) or "numpy", which builds the masks and scores lcv over
+        whole buckets with numpy arrays (see tests/matrix.py, needs numpy installed). the
+        masks and every answer r the same either way
+
+        with an index file nothing is parsed up front, a length bucket is read out of the
+        mmap the first time it is asked for (see _load_length)
+        '''
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {self.BACKENDS}")
+        self.backend = backend
+        self.matrix = None
+        if backend == "numpy":
+            # numpy is only needed by this backend, so it is only imported when it is picked
+            from .matrix import WordMatrix
+            self.matrix = WordMatrix()
+
+        self.index = None
+        self.word_list = dict() #keys r ints vals r list of words sorted
+        self.word_ids = dict() #keys r ints vals r dict {word: id}, from an index file only the words added later
+        self.length_masks = dict() #keys r ints vals r int with a bit set for every word of that len
+        self.pattern_masks = dict() #keys r ints vals r list indexed by position of dict {char: int mask}
+        self.scores = dict() #keys r ints vals r list of word scores indexed by id
+        self.load_stats = None # counters of the word list load, None for an index file
+
+        # add_words / remove_words bump the version (and the version of the length they touch),
+        # cache entries and Solvers remember the version they were made at to spot staleness
+        # ids of a length r in score order up to sorted_counts[length], words added later come after
+        self.version = 0
+        self.length_versions = dict()
+        self.sorted_counts = dict()
+
+        # LRU cache of pattern queries, key is the canonical pattern like "?A??T"
+        # value is [mask, frozenset of the words or None until get_matches asks for it,
+        # version of that length when it was made]
+        self.cache = OrderedDict()
+        self.cache_limit = cache_bytes
+        self.cache_size = 0 # rough bytes held by the cache
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_refinements = 0 # misses answered from a cached parent pattern
+
+        if index_file is not None and os.path.exists(index_file):
+            self.index = MappedIndex(index_file)
+        elif isinstance(filename, (str, os.PathLike)) and is_index_file(filename):
+            self.index = MappedIndex(filename)
+        else:
+            self._load_words(filename)
+
+    def _load_words(self, filename):
+        '''streams one or more word lists (see tests/wordlists.py) and builds every length bucket'''
+        start = time.perf_counter()
+        reader = WordListReader()
+        for path in ([filename] if isinstance(filename, (str, os.PathLike)) else filename):
+            reader.read(path)
+
+        # every length bucket gets a stable ordering (best score first, then sorted), a word's
+        # position in that list is its id and also its bit in every mask of that length
+        # pattern_masks value is the bitmask of words that fit the specific len and letter at that specific point
+        self.length_index = reader.buckets #keys r ints  vals r set of words
+        self.all_words = set().union(*self.length_index.values()) #set for every word in the dictionary
+        for length, words in self.length_index.items():
+            self._build_bucket(length, words, reader.scores)
+
+        # reading speed of the lists, and the whole load with the index build on top
+        self.load_stats = reader.stats()
+        self.load_stats["total_seconds"] = time.perf_counter() - start
+
+        '''Basic idea of pattern_masks is this
+        Imagine looking for a 3 letter word with 'O' in the middle index
+        1. you go to look self.pattern_masks[3]
+        2. at index 1 look up the char 'O'
+        3. U get an int whose set bits r the ids of words like ['DOG', "POT', 'LOT', 'GOD']
+        so "3 letter words with O in the middle and T at the end" is just one AND
+        ]'''
+
+    def _build_bucket(self, length, words, word_scores=None):
+        '''
+        gives every word of this len an id and builds the (position, char) masks
+        ids go by score, best first, so the lowest set bit of a domain is its best word
+        '''
+        if word_scores is None:
+            word_scores = dict()
+        default = self.DEFAULT_SCORE
+        ordered = sorted(words, key=lambda word: (-word_scores.get(word, default), word))
+        self.word_list[length] = ordered
+        self.scores[length] = [word_scores.get(word, default) for word in ordered]
+        self.sorted_counts[length] = len(ordered)
+        self.word_ids[length] = {word: i for i, word in enumerate(ordered)}
+        self.length_masks[length] = (1 << len(ordered)) - 1
+
+        if self.matrix is not None:
+            self.pattern_masks[length] = self.matrix.position_masks(length, ordered)
+            return
+
+        positions = [dict() for _ in range(length)]
+        for word_id, word in enumerate(ordered):
+            for i, char in enumerate(word):
+                positions[i].setdefault(char, []).append(word_id)
+
+        self.pattern_masks[length] = [
+            {char: mask_from_ids(ids, len(ordered)) for char, ids in position.items()}
+            for position in positions
+        ]
+
+    def __getattr__(self, name):
+        # all_words and length_index aren't built when loading from an index file,
+        # they r only made (for every length at once) if someone asks for them
+        if name in ("all_words", "length_index") and self.__dict__.get("index") is not None:
+            self.length_index = {
+                length: set(self.words_from_mask(length, self.length_mask(length)))
+                for length in self.lengths()
+            }
+            self.all_words = set().union(*self.length_index.values())
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def _load_length(self, length : int):
+        '''reads one length bucket out of the index file, returns False if there is no such bucket'''
+        if self.index is None or length not in self.index.entries:
+            return False
+
+        words = self.index.words(length)
+        self.word_list[length] = words
+        # the file's words r looked up in the mmap (MappedIndex.word_id), only words added
+        # later get an entry here
+        self.word_ids[length] = dict()
+        self.length_masks[length] = self.index.live_mask(length)
+        self.pattern_masks[length] = self.index.position_masks(length)
+        scores = self.index.scores(length)
+        self.scores[length] = [self.DEFAULT_SCORE] * len(words) if scores is None else scores
+        self.sorted_counts[length] = self.index.sorted_count(length)
+        return True
+
+    def lengths(self):
+        '''every word length in the dictionary'''
+        if self.index is not None:
+            # plus any length add_words started that the file doesn't have
+            return list(self.index.lengths() | self.word_list.keys())
+        return list(self.word_list)
+
+    def words_of(self, length : int):
+        '''list of the words of this len in id order'''
+        words = self.word_list.get(length)
+        if words is None:
+            if not self._load_length(length):
+                return []
+            words = self.word_list[length]
+        return words
+
+    def scores_of(self, length : int):
+        '''scores of the words of this len in id order (so best first)'''
+        scores = self.scores.get(length)
+        if scores is None:
+            if not self._load_length(length):
+                return []
+            scores = self.scores[length]
+        return scores
+
+    def best_score(self, length : int, mask : int):
+        '''highest score among the words in `mask`, None for an empty mask'''
+        if not mask:
+            return None
+        scores = self.scores_of(length)
+        # ids r best first up to sorted_counts, only words added after the load need a look each
+        sorted_count = self.sorted_counts.get(length, 0)
+        best = None
+        head = mask & ((1 << sorted_count) - 1)
+        if head:
+            best = scores[(head & -head).bit_length() - 1]
+        for word_id in iter_bits(mask >> sorted_count):
+            score = scores[sorted_count + word_id]
+            if best is None or score > best:
+                best = score
+        return best
+
+    def word_score(self, length : int, word : str):
+        '''score of `word`, None if it isn't in the dictionary'''
+        word_mask = self.word_mask(length, word)
+        if not word_mask:
+            return None
+        return self.scores_of(length)[word_mask.bit_length() - 1]
+
+    def length_mask(self, length : int):
+        '''mask with every word of this len, 0 if the dictionary has none'''
+        mask = self.length_masks.get(length)
+        if mask is None:
+            if not self._load_length(length):
+                return 0
+            mask = self.length_masks[length]
+        return mask
+
+    def position_masks(self, length : int, index : int):
+        '''dict {char: mask} for every char that shows up at `index` in words of this len'''
+        positions = self.pattern_masks.get(length)
+        if positions is None:
+            if not self._load_length(length):
+                return {}
+            positions = self.pattern_masks[length]
+        if index >= len(positions):
+            return {}
+        return positions[index]
+
+    def pattern_mask(self, length : int, index : int, char : str):
+        '''mask of the words of this len with `char` at `index`'''
+        return self.position_masks(length, index).get(char, 0)
+
+    @staticmethod
+    def pattern_key(length : int, requirements : dict):
+        '''
+        canonical form of a query, {1: 'A', 4: 'T'} for length 5 is "?A??T"
+        None if a requirement falls outside the word (nothing can match)
+        '''
+        chars = ["?"] * length
+        for index, char in requirements.items():
+            if not 0 <= index < length:
+                return None
+            chars[index] = char
+        return "".join(chars)
+
+    def match_mask(self, length : int, requirements : dict):
+        '''same as get_matches but returns the bitmask instead of building a set'''
+        if not requirements:
+            return self.length_mask(length)
+
+        key = self.pattern_key(length, requirements)
+        if key is None:
+            return 0
+        return self._cached_entry(key)[0]
+
+    def _cached_entry(self, key : str):
+        '''
+        cache entry of a pattern, built from its closest cached parent on a miss
+
+        the parent of "?A??T" is "?A???" (last fixed char dropped), so a new query
+        that only adds one letter to a cached one costs a single AND
+        '''
+        cache = self.cache
+        length = len(key)
+        version = self.length_versions.get(length, 0)
+        entry = cache.get(key)
+        if entry is not None and entry[2] == version:
+            self.cache_hits += 1
+            cache.move_to_end(key)
+            return entry
+        self.cache_misses += 1
+
+        # walk up the parents until one is cached (or none r left)
+        fixed = [i for i, char in enumerate(key) if char != "?"]
+        if not fixed:
+            # every word of the len, e.g. "???" (get_matches with no requirements)
+            return self._store(key, self.length_mask(length))
+        missing = [key]
+        parent = key
+        mask = None
+        while len(fixed) > 1:
+            last = fixed.pop()
+            parent = parent[:last] + "?" + parent[last + 1:]
+            parent_entry = cache.get(parent)
+            if parent_entry is not None and parent_entry[2] == version:
+                self.cache_refinements += 1
+                cache.move_to_end(parent)
+                mask = parent_entry[0]
+                break
+            missing.append(parent)
+
+        if mask is None:
+            mask = self.length_mask(length)
+            first = missing[-1]
+            index = next(i for i, char in enumerate(first) if char != "?")
+            mask &= self.pattern_mask(length, index, first[index])
+            entry = self._store(first, mask)
+            missing.pop()
+
+        # then come back down adding one letter per step, caching every step
+        for pattern in reversed(missing):
+            previous = [i for i, char in enumerate(pattern) if char != "?"][-1]
+            mask &= self.pattern_mask(length, previous, pattern[previous])
+            entry = self._store(pattern, mask)
+
+        return entry
+
+    def _store(self, key : str, mask : int):
+        entry = [mask, None, self.length_versions.get(len(key), 0)]
+        old = self.cache.pop(key, None)
+        if old is not None:
+            # a stale entry of an older version
+            self.cache_size -= self._entry_size(old)
+        self.cache[key] = entry
+        self.cache_size += self._entry_size(entry)
+        self._evict()
+        return entry
+
+    @staticmethod
+    def _entry_size(entry):
+        mask, words, _ = entry
+        size = sys.getsizeof(mask)
+        if words is not None:
+            size += sys.getsizeof(words)
+        return size
+
+    def _evict(self):
+        '''drops least recently used patterns until the cache fits its budget again'''
+        while self.cache_size > self.cache_limit and len(self.cache) > 1:
+            _, entry = self.cache.popitem(last=False)
+            self.cache_size -= self._entry_size(entry)
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.cache_size = 0
+
+    def cache_info(self):
+        return {
+            "entries": len(self.cache),
+            "bytes": self.cache_size,
+            "limit": self.cache_limit,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "refinements": self.cache_refinements,
+        }
+
+    def any_match(self, length : int, requirements : dict, within : int = None):
+        '''
+        True if some word of this len fits `requirements` (and is in `within`, a mask, when given)
+        stops at the first AND that comes out empty, no set or cache entry is made
+        '''
+        mask = self.length_mask(length) if within is None else within
+        for index, char in requirements.items():
+            if not mask:
+                return False
+            mask &= self.pattern_mask(length, index, char)
+        return mask != 0
+
+    def count_matches(self, length : int, requirements : dict, within : int = None):
+        '''number of words of this len that fit `requirements` (and r in `within` when given)'''
+        if within is None:
+            return self.match_mask(length, requirements).bit_count()
+        mask = within
+        for index, char in requirements.items():
+            if not mask:
+                return 0
+            mask &= self.pattern_mask(length, index, char)
+        return mask.bit_count()
+
+    def letters_at(self, length : int, requirements : dict, index : int, within : int = None):
+        '''
+        the chars that show up at `index` among the words fitting `requirements`
+        (and `within` when given), each char only costs an AND against the matches
+        '''
+        mask = self.match_mask(length, requirements)
+        if within is not None:
+            mask &= within
+        if not mask:
+            return frozenset()
+        return frozenset(
+            char for char, char_mask in self.position_masks(length, index).items()
+            if mask & char_mask
+        )
+
+    def letter_counts(self, length : int, requirements : dict, index : int, within : int = None):
+        '''same as letters_at but {char: how many matching words have it at `index`}'''
+        mask = self.match_mask(length, requirements)
+        if within is not None:
+            mask &= within
+        counts = dict()
+        if not mask:
+            return counts
+        for char, char_mask in self.position_masks(length, index).items():
+            count = (mask & char_mask).bit_count()
+            if count:
+                counts[char] = count
+        return counts
+
+    def words_from_mask(self, length : int, mask : int):
+        '''turns a mask back into the words it stands for, in id order'''
+        words = self.words_of(length)
+        return [words[word_id] for word_id in iter_bits(mask)]
+
+    def _word_id(self, length : int, word : str):
+        '''id of `word` (live or removed), None if it never was in the dictionary'''
+        if length not in self.word_ids:
+            self._load_length(length)
+        word_id = self.word_ids.get(length, {}).get(word)
+        if word_id is None and self.index is not None:
+            word_id = self.index.word_id(length, word)
+        return word_id
+
+    def word_mask(self, length : int, word : str):
+        '''single bit mask for `word`, 0 if it isn't in the dictionary'''
+        word_id = self._word_id(length, word)
+        if word_id is None:
+            return 0
+        # a removed word keeps its id but isn't live anymore
+        return (1 << word_id) & self.length_masks[length]
+
     def get_matches(self, length : int, requirements : dict):
       '''
       length: int (required len of the word)
-      requirements: dict {0: 'A', 2: 'T} means index 0 must be  A, 
+      requirements: dict {0: 'A', 2: 'T} means index 0 must be  A,
       index 2 must be a T
+
+      returns a frozenset, it is the cached object itself so it can't be changed by the caller
+      no requirements is cached like any other pattern, under "?" * length
       '''
-      #first we get the universal set of words for this length
-      len_result_set : set = self.length_index.get(length)
-
-      #if no words of this len exist empty set
-      if len_result_set is None:
-          return set()
-      
-      len_result_set = len_result_set.copy()
-
-      #apply each char filter one by 1
-      for index, char in requirements.items():
-          
-          length_patterns = self.pattern_index.get(length, {})  #gives 
-          matching_bucket = length_patterns.get((index, char))
-
-          if matching_bucket is None:
-              # if no words fit the specific char constraints return empty set
-                return set()
-          
-        # this intersection keeps only the words that exist in both the result_set and the 
-          len_result_set.intersection_update(matching_bucket)
-
-          if not len_result_set: # if running out of words then stop checking
-            break
-      
-      return len_result_set
\ No newline at end of file
+      key = self.pattern_key(length, requirements)
+      if key is None:
+          return frozenset()
+
+      entry = self._cached_entry(key)
+      if entry[1] is None:
+          self.cache_size -= self._entry_size(entry)
+          entry[1] = frozenset(self.words_from_mask(length, entry[0]))
+          self.cache_size += self._entry_size(entry)
+          self._evict()
+      return entry[1]
+
+    def add_words(self, words):
+        '''
+        puts words into the index in place, `words` holds words or (word, score) pairs.
+        a new word gets the next free id of its length and its bit in the masks, a word
+        removed before is just made live again. only the buckets of the words given r
+        touched, cached patterns of those lengths go stale (see _cached_entry)
+        returns how many words were added
+        '''
+        added = 0
+        for entry in words:
+            word, score = (entry, None) if isinstance(entry, str) else entry
+            word = normalise(word)
+            if not word:
+                continue
+            length = len(word)
+            if self.length_mask(length) == 0 and length not in self.word_list:
+                self._build_bucket(length, [])
+            self._own_bucket(length)
+
+            word_id = self._word_id(length, word)
+            if word_id is None:
+                word_id = len(self.word_list[length])
+                self.word_list[length].append(word)
+                self.word_ids[length][word] = word_id
+                self.scores[length].append(self.DEFAULT_SCORE if score is None else score)
+                for position, char in zip(self.pattern_masks[length], word):
+                    position[char] = position.get(char, 0) | (1 << word_id)
+            elif score is not None and score != self.scores[length][word_id]:
+                self.scores[length][word_id] = score
+                # the score order can't be vouched for from this id on anymore
+                self.sorted_counts[length] = min(self.sorted_counts[length], word_id)
+
+            bit = 1 << word_id
+            if self.length_masks[length] & bit:
+                continue
+            self.length_masks[length] |= bit
+            if "length_index" in self.__dict__:
+                self.length_index.setdefault(length, set()).add(word)
+                self.all_words.add(word)
+            self._changed(length)
+            added += 1
+        return added
+
+    def remove_words(self, words):
+        '''
+        takes words out of the index in place: the word keeps its id but its bit is cleared
+        from the live mask (a tombstone), every query goes through that mask so it is never
+        matched again. returns how many words were removed
+        '''
+        removed = 0
+        for word in words:
+            word = normalise(word)
+            word_mask = self.word_mask(len(word), word) if word else 0
+            if not word_mask:
+                continue
+            length = len(word)
+            self._own_bucket(length)
+            self.length_masks[length] &= ~word_mask
+            if "length_index" in self.__dict__:
+                self.length_index[length].discard(word)
+                self.all_words.discard(word)
+            self._changed(length)
+            removed += 1
+        return removed
+
+    def _own_bucket(self, length : int):
+        '''a bucket read out of an index file is read only, it gets copied before it is changed'''
+        if not isinstance(self.word_list[length], list):
+            self.word_list[length] = list(self.word_list[length])
+            self.scores[length] = list(self.scores[length])
+
+    def _changed(self, length : int):
+        self.version += 1
+        self.length_versions[length] = self.length_versions.get(length, 0) + 1
@@ -0,0 +1,134 @@
+'''
+grid family cache
+
+lots of puzzles share a block pattern (the standard symmetric 15x15 templates) and only
+differ in the letters already placed (see read_structure). building the Crossword (slots, overlaps,
+adjacency) and running the first ac3 from the full length buckets is the same work for
+all of them, so it is done once per pattern and kept here:
+
+    cache = GridCache(fast_dict)
+    solver = cache.solver("grid.txt", letters={(0, 0): "C"})
+    solver.solve()
+
+entries r keyed on structure_key() of the block pattern, hold the Crossword and the
+solver snapshot() after the initial ac3 on the empty grid, and r dropped least
+recently used first once they go over `max_bytes`. a new solver starts from that
+snapshot and only the slots its letters (the file's own plus `letters`) touch get
+propagated (Solver.apply_letters)
+
+an entry made before the dictionary changed (add_words / remove_words) is rebuilt
+'''
+
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+
+from .models import Crossword, read_structure
+from .solver import Solver
+
+
+def structure_key(structure):
+    '''hash of the block pattern, the same for every file with the same open cells'''
+    rows = ["".join("_" if cell else "#" for cell in row) for row in structure]
+    return hashlib.sha1("\n".join(rows).encode("ascii")).hexdigest()
+
+
+class GridCache():
+
+    def __init__(self, fast_dictionary, max_bytes=256 * 1024 * 1024):
+        self.fast_dict = fast_dictionary
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> [crossword, snapshot, dictionary version, size]
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def crossword(self, structure_file):
+        '''
+        the Crossword of this file's block pattern, without any letters (shared between
+        every file with that pattern, don't change it)
+        '''
+        structure, _ = read_structure(structure_file)
+        return self._entry(structure_file, structure)[0]
+
+    def solver(self, structure_file, letters=None, timeout=None, **solver_options):
+        '''
+        a Solver for the file, starting from the cached post-ac3 domains with the file's
+        letters and `letters` ({(i, j): char}, they win over the file's) applied on top,
+        solver.solve() as usual
+
+        timeout: seconds for building the entry on a miss and propagating the letters,
+        raises BudgetExhausted("timeout") past it (nothing gets cached then)
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        structure, placed = read_structure(structure_file)
+        crossword, snapshot, _, _ = self._entry(structure_file, structure, deadline)
+        solver = Solver(crossword, self.fast_dict, initial=snapshot, **solver_options)
+        if letters:
+            placed.update(letters)
+        placed = {cell: char for cell, char in placed.items() if cell in crossword.cell_slots}
+        if placed:
+            solver.deadline = deadline
+            try:
+                solver.apply_letters(placed)
+            finally:
+                solver.deadline = None
+        return solver
+
+    def _entry(self, structure_file, structure, deadline=None):
+        key = structure_key(structure)
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] == self.fast_dict.version:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        self.misses += 1
+
+        if entry is None:
+            crossword = Crossword(structure_file)
+            # the letters belong to this one file, not to the pattern
+            crossword.letters = dict()
+        else:
+            # same grid, the words changed under it: only the ac3 part is redone
+            crossword = entry[0]
+            self._drop(key)
+
+        solver = Solver(crossword, self.fast_dict)
+        solver.deadline = deadline
+        solver.propagated = solver.ac3()
+        snapshot = solver.snapshot()
+        entry = [crossword, snapshot, self.fast_dict.version, self._entry_size(crossword, snapshot)]
+
+        self.entries[key] = entry
+        self.size += entry[3]
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            self._drop(next(iter(self.entries)))
+        return entry
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.size -= entry[3]
+
+    @staticmethod
+    def _entry_size(crossword, snapshot):
+        '''rough bytes: the domain masks and support tables, plus the crossword's own tables'''
+        size = sum(sys.getsizeof(mask) for mask in snapshot["domains"].values())
+        size += sum(sys.getsizeof(mask) for mask in snapshot["unsupported"].values())
+        size += sum(sys.getsizeof(counts) for counts in snapshot["supports"].values())
+        size += sys.getsizeof(crossword.overlaps) + sys.getsizeof(crossword.cell_slots)
+        size += 200 * len(crossword.variable_list)
+        return size
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def info(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "limit": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
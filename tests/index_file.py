@@ -0,0 +1,219 @@
+'''
+precompiled on-disk dictionary index
+
+compile_index() writes everything FastDictionary builds from the word list (sorted
+word ids per length, the live word mask and the (position, char) masks) into one
+binary file. MappedIndex opens it with mmap, so a worker only reads the pages for the
+lengths it actually touches. the words themselves and the word -> id lookup (a binary
+search over the records) r served straight from those pages, which every process on
+the machine shares. the masks and scores of a length r copied out into the process
+the first time that length is used, python ints can't live in the mmap
+
+file layout (little endian):
+    b"FDIX" | u32 format version | u32 header size | json header | data
+
+the header maps every length to where its data sits:
+    {"lengths": {"5": {"count": n, "width": w, "words": offset, "order": offset, "scores": offset,
+                       "sorted": k, "live": [offset, size], "positions": [{"A": [offset, size], ...}, ...]}}}
+
+words r fixed width records (w bytes, utf-8, padded with NUL) so word id k of a length
+is at words + k * w, order is n u32 word ids sorted by their record bytes (what
+MappedIndex.word_id searches), scores r n float64 in id order (files without them score every
+word FastDictionary.DEFAULT_SCORE), the first k ids r in score order (words added
+after the load come after them), and masks r the raw bytes of the python int. words
+taken out with remove_words stay in the records but not in the live mask
+'''
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+
+MAGIC = b"FDIX"
+VERSION = 2
+PREAMBLE = struct.Struct("<4sII")
+WORD_ID = struct.Struct("<I")
+
+
+def compile_index(dictionary, path):
+    '''writes `dictionary` (a FastDictionary) to an index file at `path`'''
+    header = {"lengths": {}}
+    chunks = []
+    offset = 0
+
+    def add_chunk(data):
+        nonlocal offset
+        start = offset
+        chunks.append(data)
+        offset += len(data)
+        return start
+
+    for length in sorted(dictionary.lengths()):
+        words = dictionary.words_of(length)
+        encoded = [word.encode("utf-8") for word in words]
+        width = max((len(word) for word in encoded), default=0)
+        n_bytes = (len(words) + 7) // 8
+
+        def mask_chunk(mask):
+            return [add_chunk(mask.to_bytes(n_bytes, "little")), n_bytes]
+
+        records = [word.ljust(width, b"\0") for word in encoded]
+        order = sorted(range(len(words)), key=records.__getitem__)
+        entry = {
+            "count": len(words),
+            "width": width,
+            "words": add_chunk(b"".join(records)),
+            "order": add_chunk(b"".join(WORD_ID.pack(word_id) for word_id in order)),
+            "scores": add_chunk(_float_bytes(dictionary.scores_of(length))),
+            "sorted": dictionary.sorted_counts.get(length, len(words)),
+            "live": mask_chunk(dictionary.length_mask(length)),
+            "positions": [
+                {char: mask_chunk(mask) for char, mask in dictionary.position_masks(length, i).items()}
+                for i in range(length)
+            ],
+        }
+        header["lengths"][str(length)] = entry
+
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as file:
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        file.write(header_bytes)
+        for chunk in chunks:
+            file.write(chunk)
+
+
+def _float_bytes(values):
+    floats = array("d", values)
+    if sys.byteorder == "big":
+        floats.byteswap()
+    return floats.tobytes()
+
+
+def is_index_file(path):
+    '''True if `path` starts with the index magic bytes'''
+    try:
+        with open(path, "rb") as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class MappedWords(Sequence):
+    '''read only list of the words of one length, decoded from the mmap on access'''
+
+    def __init__(self, buffer, start, count, width):
+        self.buffer = buffer
+        self.start = start
+        self.count = count
+        self.width = width
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, word_id):
+        if isinstance(word_id, slice):
+            return [self[i] for i in range(*word_id.indices(self.count))]
+        if word_id < 0:
+            word_id += self.count
+        if not 0 <= word_id < self.count:
+            raise IndexError(word_id)
+        start = self.start + word_id * self.width
+        return self.buffer[start:start + self.width].rstrip(b"\0").decode("utf-8")
+
+
+class MappedIndex():
+    '''an index file opened with mmap, nothing is decoded until a length is asked for'''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_size = PREAMBLE.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a dictionary index file")
+        if version != VERSION:
+            raise ValueError(f"{path} has index format {version}, expected {VERSION}")
+
+        header_start = PREAMBLE.size
+        header = json.loads(self.buffer[header_start:header_start + header_size])
+        self.data_start = header_start + header_size
+        self.entries = {int(length): entry for length, entry in header["lengths"].items()}
+
+    def lengths(self):
+        return self.entries.keys()
+
+    def words(self, length):
+        entry = self.entries[length]
+        return MappedWords(self.buffer, self.data_start + entry["words"], entry["count"], entry["width"])
+
+    def word_id(self, length, word):
+        '''id of `word` in the file, None if it isn't there. binary search over the records in the mmap'''
+        entry = self.entries.get(length)
+        if entry is None:
+            return None
+        width = entry["width"]
+        key = word.encode("utf-8")
+        if len(key) > width:
+            return None
+        key = key.ljust(width, b"\0")
+        buffer = self.buffer
+        words = self.data_start + entry["words"]
+        order = self.data_start + entry["order"]
+        low, high = 0, entry["count"]
+        while low < high:
+            middle = (low + high) // 2
+            word_id, = WORD_ID.unpack_from(buffer, order + 4 * middle)
+            start = words + word_id * width
+            record = buffer[start:start + width]
+            if record < key:
+                low = middle + 1
+            elif record > key:
+                high = middle
+            else:
+                return word_id
+        return None
+
+    def _mask(self, offset, size):
+        start = self.data_start + offset
+        return int.from_bytes(self.buffer[start:start + size], "little")
+
+    def live_mask(self, length):
+        return self._mask(*self.entries[length]["live"])
+
+    def position_masks(self, length):
+        '''list indexed by position of {char: mask}, same shape as FastDictionary.pattern_masks'''
+        return [
+            {char: self._mask(offset, size) for char, (offset, size) in position.items()}
+            for position in self.entries[length]["positions"]
+        ]
+
+    def sorted_count(self, length):
+        '''how many ids of this len from the start r in score order'''
+        entry = self.entries[length]
+        return entry.get("sorted", entry["count"])
+
+    def scores(self, length):
+        '''array of the word scores of this len in id order, None if the file has no scores'''
+        entry = self.entries[length]
+        if "scores" not in entry:
+            return None
+        start = self.data_start + entry["scores"]
+        scores = array("d", self.buffer[start:start + 8 * entry["count"]])
+        if sys.byteorder == "big":
+            scores.byteswap()
+        return scores
+
+    def close(self):
+        self.buffer.close()
+
+
+if __name__ == "__main__":
+    # python -m tests.index_file data/words.csv [more lists...] data/words.fdix
+    from .dictionary import FastDictionary
+
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python -m tests.index_file words.csv [words...] index_file")
+    compile_index(FastDictionary(sys.argv[1:-1]), sys.argv[-1])
@@ -0,0 +1,79 @@
+'''
+numpy backend for FastDictionary (FastDictionary(backend="numpy"))
+
+a length bucket is a 2D uint32 array, one row per word id and one column per position,
+holding the char code points. the two jobs that go over a whole bucket or a whole
+domain word by word in python use it instead:
+- building the (position, char) masks of a bucket: one column comparison per char,
+  packed straight into the int mask (FastDictionary._build_bucket)
+- scoring the words of a big domain for lcv: one lookup of the crossing histogram per
+  crossing for every word at once (Solver.order_domain_values)
+
+domains stay the int bitmasks the rest of the engine uses and every answer is the same
+as the pure python one. numpy is only imported when this backend is picked
+'''
+
+import numpy as np
+
+
+class WordMatrix():
+
+    # lcv on fewer words than this stays in python, numpy's call overhead isn't worth it
+    LCV_MIN_WORDS = 64
+
+    def __init__(self):
+        self.matrices = dict() #keys r ints vals r (words x positions) uint32 arrays
+
+    def matrix(self, length : int, words):
+        '''
+        the words x positions array of this len, `words` in id order. words only ever get
+        appended to a bucket (a removed word keeps its id), so a cached array is good as
+        long as it has a row for every word
+        '''
+        matrix = self.matrices.get(length)
+        if matrix is None or len(matrix) != len(words):
+            if words:
+                codes = np.frombuffer("".join(words).encode("utf-32-le"), dtype="<u4")
+                matrix = codes.reshape(len(words), length)
+            else:
+                matrix = np.zeros((0, length), dtype="<u4")
+            self.matrices[length] = matrix
+        return matrix
+
+    def position_masks(self, length : int, words):
+        '''list indexed by position of {char: mask}, chars in order of their first word like _build_bucket'''
+        positions = []
+        for column in self.matrix(length, words).T:
+            codes, first = np.unique(column, return_index=True)
+            positions.append({
+                chr(code): int.from_bytes(np.packbits(column == code, bitorder="little").tobytes(), "little")
+                for code in codes[np.argsort(first)].tolist()
+            })
+        return positions
+
+    def lcv_order(self, length : int, words, word_ids, histograms, top_k=None):
+        '''
+        word_ids sorted by their lcv score (sum of histogram[char at index] over the
+        (index, histogram) pairs), best first and ties in the order given. with top_k only
+        the k best come first and the rest keep their order, the same as Solver's heapq path
+        '''
+        ids = np.asarray(word_ids)
+        rows = self.matrix(length, words)[ids]
+        scores = np.zeros(len(ids), dtype=np.int64)
+        for index, counts in histograms:
+            if not counts:
+                continue
+            chars = np.fromiter((ord(char) for char in counts), dtype="<u4", count=len(counts))
+            values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+            order = np.argsort(chars)
+            chars, values = chars[order], values[order]
+            column = rows[:, index]
+            at = np.minimum(np.searchsorted(chars, column), len(chars) - 1)
+            scores += np.where(chars[at] == column, values[at], 0)
+
+        ranked = np.argsort(-scores, kind="stable")
+        if top_k is None or top_k >= len(ids):
+            return ids[ranked].tolist()
+        rest = np.ones(len(ids), dtype=bool)
+        rest[ranked[:top_k]] = False
+        return ids[ranked[:top_k]].tolist() + ids[rest].tolist()
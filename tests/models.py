@@ -1,3 +1,6 @@
+from .wordlists import iter_words
+
+
 class Variable():
 
     ACROSS = "across"
@@ -15,9 +18,11 @@ class Variable():
                 (self.i + (k if self.direction == Variable.DOWN else 0),
                  self.j + (k if self.direction == Variable.ACROSS else 0))
             )
+        # variables r dict keys in every inner loop of the solver, hash once
+        self._hash = hash((self.i, self.j, self.direction, self.length))
 
     def __hash__(self):
-        return hash((self.i, self.j, self.direction, self.length))
+        return self._hash
 
     def __eq__(self, other):
         return (
@@ -35,113 +40,49 @@ class Variable():
         return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
 
 
-class Crossword():
-
-    def __init__(self, structure_file, words_file):
-
-        # Determine structure of crossword
-        with open(structure_file) as f:
-            contents = f.read().splitlines()
-            self.height = len(contents)
-            self.width = max(len(line) for line in contents)
-
-            self.structure = []
-            for i in range(self.height):
-                row = []
-                for j in range(self.width):
-                    if j >= len(contents[i]):
-                        row.append(False)
-                    elif contents[i][kj] == "_":
-                        row.append(True)
-                    else:
-                        row.append(False)
-                self.structure.append(row)
-
-        # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
-
-        # Determine variable set
-        self.variables = set()
-        for i in range(self.height):
-            for j in range(self.width):
-
-                # Vertical words
-                starts_word = (
-                    self.structure[i][j]
-                    and (i == 0 or not self.structure[i - 1][j])
-                )
-                if starts_word:
-                    length = 1
-                    for k in range(i + 1, self.height):
-                        if self.structure[k][j]:
-                            length += 1
-                        else:
-                            break
-                    if length > 1:k
-                        self.variables.add(Variable(
-                            i=class Variable():
-
-    ACROSS = "across"
-    DOWN = "down"
-
-    def __init__(self, i, j, direction, length):
-        """Create a new variable with starting point, direction, and length."""
-        self.i = i
-        self.j = j
-        self.direction = direction
-        self.length = length
-        self.cells = []
-        for k in range(self.length):
-            self.cells.append(
-                (self.i + (k if self.direction == Variable.DOWN else 0),
-                 self.j + (k if self.direction == Variable.ACROSS else 0))
-            )
-
-    def __hash__(self):
-        return hash((self.i, self.j, self.direction, self.length))
-
-    def __eq__(self, other):
-        return (
-            (self.i == other.i) and
-            (self.j == other.j) and
-            (self.direction == other.direction) and
-            (self.length == other.length)
-        )
-
-    def __str__(self):
-        return f"({self.i}, {self.j}) {self.direction} : {self.length}"
-
-    def __repr__(self):
-        direction = repr(self.direction)
-        return f"Variable({self.i}, {self.j}, {direction}, {self.length})"
+def read_structure(structure_file):
+    """
+    Cells of a structure file: rows of booleans, True for an open cell, and the letters
+    already placed, {(i, j): upper case letter}.
+    "_" is an empty open cell, a letter A-Z (either case) is an open cell filled in
+    advance, anything else is a block. short rows r padded with blocks.
+    A slot whose cells r all letters is a locked word.
+    """
+    with open(structure_file) as f:
+        contents = f.read().splitlines()
+    width = max((len(line) for line in contents), default=0)
+
+    structure = []
+    letters = dict()
+    for i, line in enumerate(contents):
+        row = []
+        for j in range(width):
+            char = line[j] if j < len(line) else "#"
+            if char.isascii() and char.isalpha():
+                letters[i, j] = char.upper()
+                row.append(True)
+            else:
+                row.append(char == "_")
+        structure.append(row)
+    return structure, letters
 
 
 class Crossword():
 
-    def __init__(self, structure_file, words_file):
+    def __init__(self, structure_file, words_file=None):
 
         # Determine structure of crossword
-        with open(structure_file) as f:
-            contents = f.read().splitlines()
-            self.height = len(contents)
-            self.width = max(len(line) for line in contents)
-
-            self.structure = []
-            for i in range(self.height):
-                row = []
-                for j in range(self.width):
-                    if j >= len(contents[i]):
-                        row.append(False)
-                    elif contents[i][j] == "_":
-                        row.append(True)
-                    else:
-                        row.append(False)
-                self.structure.append(row)
+        # letters r the cells filled in advance, the solver restricts the slots through them
+        self.structure, self.letters = read_structure(structure_file)
+        self.height = len(self.structure)
+        self.width = len(self.structure[0]) if self.structure else 0
 
         # Save vocabulary list
-        with open(words_file) as f:
-            self.words = set(f.read().upper().splitlines())
+        # the Solver gets its words from FastDictionary, so this is only read when asked for
+        self.words = set()
+        if words_file is not None:
+            # streamed and normalised the same way FastDictionary reads its lists
+            self.words = {word for word, _ in iter_words(words_file)}
 
         # Determine variable set
         self.variables = set()
@@ -186,80 +127,56 @@ class Crossword():
                             length=length
                         ))
 
-        # Compute overlaps for each word
-        # For any pair of variables v1, v2, their overlap is either:
-        #    None, if the two variables do not overlap; or
-        #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
-
-    def neighbors(self, var):
-        """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )i, j=j,
-                            direction=Variable.DOWN,
-                            length=length
-                        ))
+        # Give every variable an integer id, ordered by position so ids r stable between runs
+        self.variable_list = sorted(
+            self.variables, key=lambda v: (v.i, v.j, v.direction)
+        )
+        self.variable_ids = {var: i for i, var in enumerate(self.variable_list)}
 
-                # Horizontal words
-                starts_word = (
-                    self.structure[i][j]
-                    and (j == 0 or not self.structure[i][j - 1])
-                )
-                if starts_word:
-                    length = 1
-                    for k in range(j + 1, self.width):
-                        if self.structure[i][k]:
-                            length += 1
-                        else:
-                            break
-                    if length > 1:
-                        self.variables.add(Variable(
-                            i=i, j=j,
-                            direction=Variable.ACROSS,
-                            length=length
-                        ))
+        # Index every open cell to the slots running through it
+        # (at most one across and one down slot)
+        self.cell_slots = dict()
+        for var_id, var in enumerate(self.variable_list):
+            for k, cell in enumerate(var.cells):
+                self.cell_slots.setdefault(cell, []).append((var_id, k))
 
         # Compute overlaps for each word
-        # For any pair of variables v1, v2, their overlap is either:
-        #    None, if the two variables do not overlap; or
+        # For any pair of crossing variables v1, v2, their overlap is
         #    (i, j), where v1's ith character overlaps v2's jth character
+        # pairs that don't cross r not stored, so overlaps.get((v1, v2)) is None for them
         self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        adjacency = [[] for _ in self.variable_list]
+        for slots in self.cell_slots.values():
+            for id1, k1 in slots:
+                for id2, k2 in slots:
+                    if id1 != id2:
+                        adjacency[id1].append((id2, k1, k2))
+                        self.overlaps[
+                            self.variable_list[id1], self.variable_list[id2]
+                        ] = (k1, k2)
+
+        # Neighbor and crossing tables keyed by Variable, built once so the solver never rebuilds them
+        self._neighbors = dict()
+        self._crossings = dict()
+        for var_id, var in enumerate(self.variable_list):
+            crossings = tuple(
+                (self.variable_list[target], k1, k2)
+                for target, k1, k2 in sorted(adjacency[var_id])
+            )
+            self._crossings[var] = crossings
+            self._neighbors[var] = tuple(v for v, _, _ in crossings)
 
     def neighbors(self, var):
-        """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
\ No newline at end of file
+        """Given a variable, return tuple of overlapping variables."""
+        return self._neighbors[var]
+
+    def crossings(self, var):
+        """
+        Given a variable, return tuple of (neighbor, i, j) where var's ith
+        character overlaps neighbor's jth character.
+        """
+        return self._crossings[var]
+
+    def degree(self, var):
+        """Number of variables crossing var."""
+        return len(self._neighbors[var])
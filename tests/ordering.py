@@ -0,0 +1,135 @@
+'''
+variable ordering for Solver
+
+keeps every unassigned variable in a heap keyed by the heuristic, so picking the next
+slot is a pop instead of a scan over every variable. the heap is lazy: when a key
+changes (domain shrinks, a neighbor gets assigned, a weight goes up) a new entry is
+pushed and the old one is skipped when it comes out
+
+heuristics, smaller key is picked first:
+- "mrv": domain size
+- "mrv+degree": domain size, ties go to the slot with more crossings
+- "dom/deg": domain size / number of crossings
+- "dom/wdeg": domain size / summed weight of the constraints to unassigned neighbors,
+   a constraint's weight goes up by one every time it wipes out a domain in ac3, so the
+   slots that keep causing failures get picked early
+'''
+
+import heapq
+
+
+class VariableOrder():
+
+    HEURISTICS = ("mrv", "mrv+degree", "dom/deg", "dom/wdeg")
+
+    def __init__(self, solver, heuristic="mrv", rnd=None):
+        '''
+        rnd: optional random.Random, ties r then broken at random instead of by variable id
+        '''
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"Unknown variable heuristic {heuristic!r}, expected one of {self.HEURISTICS}")
+
+        self.solver = solver
+        self.crossword = solver.crossword
+        self.heuristic = heuristic
+        self.rnd = rnd
+
+        # constraint weights for dom/wdeg, one per crossing pair (same weight both ways)
+        self.weights = {
+            self._constraint(x, y): 1
+            for x in self.crossword.variable_list
+            for y in self.crossword.neighbors(x)
+        }
+        self.weighted_degree = {
+            var: len(self.crossword.neighbors(var)) for var in self.crossword.variable_list
+        }
+
+        self.assigned = set()
+        self.heap = []
+        self.version = dict()
+        self.reset_ties()
+
+    def _constraint(self, x, y):
+        ids = self.crossword.variable_ids
+        return (x, y) if ids[x] < ids[y] else (y, x)
+
+    def reset_ties(self):
+        '''new tie breaks (drawn from rnd when there is one) and a fresh heap'''
+        ids = self.crossword.variable_ids
+        if self.rnd is None:
+            self.ties = dict(ids)
+        else:
+            order = list(self.crossword.variable_list)
+            self.rnd.shuffle(order)
+            self.ties = {var: i for i, var in enumerate(order)}
+        self.rebuild()
+
+    def key(self, var):
+        size = self.solver.domains[var].bit_count()
+        if self.heuristic == "mrv":
+            return size
+        if self.heuristic == "mrv+degree":
+            return (size, -self.crossword.degree(var))
+        if self.heuristic == "dom/deg":
+            return size / max(self.crossword.degree(var), 1)
+        return size / max(self.weighted_degree[var], 1)
+
+    def push(self, var):
+        '''(re)queues var with its current key, older entries of var go stale'''
+        if var in self.assigned:
+            return
+        version = self.version.get(var, 0) + 1
+        self.version[var] = version
+        heapq.heappush(self.heap, (self.key(var), self.ties[var], version, var))
+        if len(self.heap) > 8 * len(self.version) + 64:
+            self.rebuild()
+
+    def rebuild(self):
+        '''drops every stale entry, one entry per unassigned variable'''
+        self.heap = []
+        self.version = {}
+        for var in self.crossword.variable_list:
+            if var not in self.assigned:
+                self.version[var] = 1
+                self.heap.append((self.key(var), self.ties[var], 1, var))
+        heapq.heapify(self.heap)
+
+    def select(self, assignment):
+        '''the unassigned variable with the smallest key, in O(log V) amortised'''
+        heap = self.heap
+        while heap:
+            _, _, version, var = heap[0]
+            if var in assignment or self.version.get(var) != version:
+                heapq.heappop(heap)
+                continue
+            return var
+        return None
+
+    def assign(self, var):
+        self.assigned.add(var)
+        # a new version instead of none, so the entries var still has in the heap can't
+        # come back to life when unassign pushes it again
+        self.version[var] = self.version.get(var, 0) + 1
+        if self.heuristic == "dom/wdeg":
+            # var's constraints stop counting for its neighbors
+            for neighbor in self.crossword.neighbors(var):
+                self.weighted_degree[neighbor] -= self.weights[self._constraint(var, neighbor)]
+                self.push(neighbor)
+
+    def unassign(self, var):
+        self.assigned.discard(var)
+        if self.heuristic == "dom/wdeg":
+            for neighbor in self.crossword.neighbors(var):
+                self.weighted_degree[neighbor] += self.weights[self._constraint(var, neighbor)]
+                self.push(neighbor)
+        self.push(var)
+
+    def wipeout(self, x, y):
+        '''revise(x, y) emptied x: the constraint between them gets heavier'''
+        self.weights[self._constraint(x, y)] += 1
+        for var, other in ((x, y), (y, x)):
+            if other not in self.assigned:
+                self.weighted_degree[var] += 1
+        if self.heuristic == "dom/wdeg":
+            self.push(x)
+            self.push(y)
@@ -0,0 +1,166 @@
+'''
+portfolio solving: the same grid is searched by several worker processes, each with
+its own seed, variable heuristic and value order. the first one to find a fill wins
+and the rest r told to stop
+
+the crossword and the dictionary r handed to the workers by fork, so the index
+(and the mmap pages when the dictionary comes from an index file) is shared read
+only instead of being rebuilt in every worker
+'''
+
+import multiprocessing
+import queue
+import time
+
+from .solver import Solver, SearchCancelled
+
+DEFAULT_CONFIGS = [
+    {"var_heuristic": "mrv", "value_order": "static", "seed": None},
+    {"var_heuristic": "mrv+degree", "value_order": "static", "seed": None},
+    {"var_heuristic": "mrv+degree", "value_order": "lcv", "seed": None},
+    {"var_heuristic": "dom/wdeg", "value_order": "static", "seed": None},
+    {"var_heuristic": "mrv", "value_order": "random", "seed": 1},
+    {"var_heuristic": "mrv+degree", "value_order": "random", "seed": 2},
+    {"var_heuristic": "dom/wdeg", "value_order": "static", "seed": 3, "restarts": "luby"},
+    {"var_heuristic": "dom/wdeg", "value_order": "random", "seed": 5},
+]
+
+# seconds the parent waits on the result queue before it looks at the workers again
+POLL = 0.5
+
+# set by solve_portfolio right before the workers fork, read by _worker
+_shared = None
+
+
+def _worker(worker_id, config, stop_event, results, timeout):
+    crossword, fast_dictionary = _shared
+    solver = None
+    error = None
+    start = time.perf_counter()
+    try:
+        solver = Solver(crossword, fast_dictionary, **config)
+        # polled once per node and once per word tried, is_set() is cheap next to an ac3 call
+        solver.stop_check = stop_event.is_set
+        assignment = solver.solve(timeout=timeout)
+        status = solver.status
+    except SearchCancelled:
+        assignment = None
+        status = "cancelled"
+    except Exception as failure:
+        # anything else still gets a result out, the parent waits for one per worker
+        assignment = None
+        status = "error"
+        error = f"{type(failure).__name__}: {failure}"
+
+    results.put((worker_id, status, assignment, {
+        "time": time.perf_counter() - start,
+        "nodes": None if solver is None else solver.nodes,
+        "backtracks": None if solver is None else solver.backtracks,
+        "restarts": None if solver is None else solver.restarts,
+        "error": error,
+    }))
+
+
+def solve_portfolio(crossword, fast_dictionary, workers=None, configs=None, timeout=None):
+    '''
+    searches `crossword` with one process per config, returns a dict:
+        assignment: the winning fill, or None
+        status: "solved", "unsatisfiable" (a worker searched everything without a fill),
+        "timeout" (no worker could tell before its budget ran out) or "error" (every
+        worker failed, see their "error")
+        winner: the config that found the fill, or that proved there is none
+        workers: per worker {config, status, time, nodes, backtracks, restarts, error}
+
+    workers: how many of the configs to run (default every config, at most one per cpu)
+    configs: list of Solver keyword arguments, default DEFAULT_CONFIGS
+    timeout: seconds before every worker is stopped, the workers also get it as their own
+    solve() budget so they stop by themselves
+    '''
+    global _shared
+
+    if configs is None:
+        configs = DEFAULT_CONFIGS
+    if workers is None:
+        workers = min(len(configs), multiprocessing.cpu_count())
+    configs = configs[:workers]
+
+    context = multiprocessing.get_context("fork")
+    stop_event = context.Event()
+    results = context.Queue()
+
+    _shared = (crossword, fast_dictionary)
+    try:
+        processes = [
+            context.Process(target=_worker, args=(worker_id, config, stop_event, results, timeout), daemon=True)
+            for worker_id, config in enumerate(configs)
+        ]
+        for process in processes:
+            process.start()
+    finally:
+        _shared = None
+
+    report = [
+        {"config": config, "status": "running", "time": None, "nodes": None, "backtracks": None,
+         "restarts": None, "error": None}
+        for config in configs
+    ]
+    # "timeout" stands until some worker settles it, the whole run or every worker's
+    # own budget running out both end up there
+    outcome = {"assignment": None, "status": "timeout", "winner": None, "workers": report}
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pending = len(processes)
+
+    while pending:
+        # every worker posts a result before it exits, one that is gone without one died
+        # (killed, out of memory). whatever it did post is on the queue before its exit,
+        # so a worker already gone when the get below comes back empty isn't coming back
+        gone = [
+            worker_id for worker_id, process in enumerate(processes)
+            if process.exitcode is not None and report[worker_id]["status"] == "running"
+        ]
+        wait = POLL if deadline is None else min(max(deadline - time.monotonic(), 0), POLL)
+        try:
+            worker_id, status, assignment, stats = results.get(timeout=wait)
+        except queue.Empty:
+            for worker_id in gone:
+                pending -= 1
+                report[worker_id].update(
+                    status="error", error=f"worker exited with code {processes[worker_id].exitcode}"
+                )
+            if deadline is not None and time.monotonic() >= deadline:
+                stop_event.set()
+                break
+            continue
+
+        pending -= 1
+        report[worker_id].update(stats, status=status)
+        if status == "solved" and outcome["assignment"] is None:
+            outcome.update(assignment=assignment, status="solved", winner=configs[worker_id])
+            stop_event.set()
+        elif status == "unsatisfiable" and outcome["status"] == "timeout":
+            # one complete search is enough to know there is no fill
+            outcome.update(status="unsatisfiable", winner=configs[worker_id])
+            stop_event.set()
+
+    # once stopped the workers report before their next word, collect what they say for
+    # the per worker stats and kill anything that doesn't answer
+    while pending:
+        try:
+            worker_id, status, _, stats = results.get(timeout=1)
+        except queue.Empty:
+            break
+        pending -= 1
+        report[worker_id].update(stats, status=status)
+
+    for process in processes:
+        process.join(timeout=1)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+    for entry in report:
+        if entry["status"] == "running":
+            entry["status"] = "killed"
+    if outcome["status"] == "timeout" and all(entry["status"] == "error" for entry in report):
+        outcome["status"] = "error"
+
+    return outcome
@@ -0,0 +1,35 @@
+'''
+restart schedules for Solver(restarts=...)
+
+a schedule is an endless iterator of cutoffs, the number of backtracks one run of the
+search may take before it starts over:
+- "luby": base * (1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ...), never more than a
+   log factor off the best fixed cutoff, without having to know it
+- "geometric": base, base * factor, base * factor^2, ...
+'''
+
+SCHEDULES = ("luby", "geometric")
+
+
+def luby(i : int):
+    '''i-th term (from 1) of the luby sequence'''
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+def cutoffs(schedule="luby", base=100, factor=1.5):
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Unknown restart schedule {schedule!r}, expected one of {SCHEDULES}")
+
+    i = 1
+    cutoff = float(base)
+    while True:
+        if schedule == "luby":
+            yield base * luby(i)
+        else:
+            yield int(cutoff)
+            cutoff *= factor
+        i += 1
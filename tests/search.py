@@ -0,0 +1,434 @@
+'''
+explicit stack search for Solver
+
+the depth first search with MAC (ac3 after every assignment), conflict-directed
+backjumping, nogoods, restarts and budgets, run as a loop over a stack of frames
+instead of one python call per slot. so there is no recursion limit on big grids, and
+since the whole search state is the stack plus the solver's trail the search can stop
+anywhere and pick up again later, in the same process (run() again) or in a new one
+(checkpoint() / Search.restore())
+
+a frame is a short list, one per assigned level:
+    [var, mask of the words of var's domain not tried yet, word id tried last (None before
+     the first), conflict levels collected so far, trail mark of the word being tried
+     (None if none)]
+the order the words get tried in is made again from that mask whenever the frame is back
+on top (Solver.order_domain_values), so a level costs a mask, not a list of its words
+
+    search = Search(solver)
+    while search.run(max_nodes=10000) is None and search.status == "paused":
+        save(search.checkpoint())
+'''
+
+from itertools import islice
+
+from . import restarts as restart_schedules
+
+
+class SearchCancelled(Exception):
+    '''raised out of the search when stop_check says it should stop'''
+
+
+class BudgetExhausted(SearchCancelled):
+    '''raised out of the search when the time or node budget of solve() runs out'''
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class Restart(Exception):
+    '''the current run of the search used up its restart cutoff'''
+
+
+# bit 0 of a conflict mask (levels start at 1): the failure comes from a fill that was
+# handed out or from the score bound, not from the words themselves. it is carried down
+# with the levels like any culprit, and nothing it reaches gets learned as a nogood, that
+# nogood would outlive the call
+NOT_LEARNED = 1
+
+
+class Search():
+
+    # how run() can come back:
+    # "solved" - search.assignment is a full fill
+    # "exhausted" - there is no (other) fill
+    # "paused" - max_nodes of this run() call went by
+    # "timeout" / "node_limit" - the budget of solver.solve() ran out
+    # everything but "exhausted" can be continued with another run()
+    STATUSES = ("new", "paused", "solved", "exhausted", "timeout", "node_limit")
+
+    def __init__(self, solver, assignment=None, propagate=True):
+        '''
+        assignment: words already in place (they don't get a level, nothing jumps back to them)
+        propagate: run the initial ac3 on the first run(), False when the domains
+        already r arc consistent (it is skipped anyway once solver.propagated is set)
+        '''
+        self.solver = solver
+        self.assignment = dict() if assignment is None else assignment
+        self.stack = []
+        self.opening = True # the next step opens a node (True) or tries the top frame's next word
+        self.status = "new"
+        self.propagate = propagate
+        self.root = None
+        self.cutoffs = None
+        # optional bound check, prune(assignment) is True when nothing below the current
+        # node can be good enough (branch and bound, see Solver.solve_best)
+        self.prune = None
+
+    def _start(self):
+        solver = self.solver
+        if self.propagate and solver.is_stale():
+            # the dictionary changed since the last search, see Solver.refresh
+            solver.refresh()
+        if self.propagate and not solver.propagated:
+            if not solver.ac3():
+                self.status = "exhausted"
+                return False
+            solver.propagated = True
+        if self.propagate and solver.probe_limit != 0 and not self._probe():
+            self.status = "exhausted"
+            return False
+        self.root = solver.trail_mark()
+        if solver.restart_schedule is not None:
+            self.cutoffs = restart_schedules.cutoffs(
+                solver.restart_schedule, solver.restart_base, solver.restart_factor
+            )
+            solver.restart_at = solver.backtracks + next(self.cutoffs)
+        return True
+
+    def run(self, max_nodes=None):
+        '''
+        searches until a fill turns up, there is none, or it has to stop (see STATUSES)
+        returns the assignment when solved, None otherwise. after "solved" the next run()
+        looks for the next fill
+
+        max_nodes: open at most this many nodes in this call and then pause
+        '''
+        solver = self.solver
+        if self.status == "exhausted":
+            return None
+        if self.root is None:
+            # not started yet, or the start ran out of time halfway (it goes again then)
+            try:
+                if not self._start():
+                    return None
+            except BudgetExhausted as stop:
+                self.status = stop.status
+                return None
+        if self.status == "solved":
+            # carry on past the fill found last time, it counts as a failure that every
+            # level is behind, so nothing gets jumped over
+            if not self.stack:
+                self.status = "exhausted"
+                return None
+            self._retreat(((1 << (len(self.stack) + 1)) - 2) | NOT_LEARNED)
+            self.opening = False
+
+        stop_at = None if max_nodes is None else solver.nodes + max_nodes
+        while True:
+            try:
+                self.status = self._loop(stop_at)
+            except Restart:
+                try:
+                    if self._restart():
+                        continue
+                    self.status = "exhausted"
+                except BudgetExhausted as stop:
+                    # the probing pass of the restart ran out of time
+                    self.status = stop.status
+            except BudgetExhausted as stop:
+                self.status = stop.status
+            if self.status == "exhausted":
+                solver.restart_at = None
+            return self.assignment if self.status == "solved" else None
+
+    def _loop(self, stop_at):
+        solver = self.solver
+        stack = self.stack
+        assignment = self.assignment
+
+        while True:
+            if self.opening:
+                if solver.assignment_complete(assignment):
+                    return "solved"
+                if stop_at is not None and solver.nodes >= stop_at:
+                    return "paused"
+
+                solver.nodes += 1
+                try:
+                    solver._check_limits()
+                except Exception:
+                    # the node isn't opened after all, whatever carries on opens it again
+                    solver.nodes -= 1
+                    raise
+                var = solver.select_unassigned_variable(assignment)
+                # words already gone from var's domain were taken out by these levels
+                stack.append([var, solver.domains[var], None, solver.explain[var], None])
+                self.opening = False
+
+            elif not stack:
+                return "exhausted"
+
+            elif self._advance():
+                self.opening = True
+
+    def _advance(self):
+        '''
+        tries the words of the top frame from where it left off, True once one is assigned
+        and ac3 is fine with it. a frame that runs out of words is popped and its
+        failure handed down, the loop then carries on with whatever frame is on top
+        '''
+        solver = self.solver
+        stack = self.stack
+        assignment = self.assignment
+        frame = stack[-1]
+        var, remaining, _, conflict, _ = frame
+        level = len(stack)
+        words = solver.fast_dict.words_of(var.length)
+
+        for word_id in solver.order_domain_values(var, assignment, remaining):
+            bit = 1 << word_id
+            value = words[word_id]
+            if not solver.consistent(value, var, assignment):
+                conflict |= solver._culprits(value, var, assignment)
+                remaining &= ~bit
+                continue
+
+            if solver.nogoods:
+                known = solver._nogood_conflict(var, word_id)
+                if known is not None:
+                    conflict |= known
+                    remaining &= ~bit
+                    continue
+
+            # a single node can try a lot of words, so the budgets r looked at per word too
+            # the frame is saved first, stopping here loses nothing
+            frame[1] = remaining
+            frame[3] = conflict
+            solver._check_limits()
+
+            # only what changes from here on gets recorded, undo() rolls it back
+            frame[1] = remaining & ~bit
+            frame[2] = word_id
+            frame[4] = solver.trail_mark()
+            self._assign(var, word_id, value, level)
+
+            # maintaining arc consistency
+            try:
+                consistent = solver.ac3([(n, var) for n in solver.crossword.neighbors(var)])
+            except BudgetExhausted:
+                # out of time halfway through, the word goes back untried for the next run()
+                self._take_back(frame)
+                frame[1] |= bit
+                raise
+            if consistent:
+                if self.prune is None or not self.prune(assignment):
+                    return True
+                # the bound depends on every word placed so far, so every level is behind it
+                # (and on the best fill of this call, so it isn't learned)
+                self._retreat(((1 << (level + 1)) - 2) | NOT_LEARNED)
+                return False
+            self._retreat(solver.conflict)
+            return False
+
+        stack.pop()
+        failed = conflict & ((1 << level) - 1)
+        if stack:
+            self._retreat(failed)
+        else:
+            solver.conflict = failed
+        return False
+
+    def _assign(self, var, word_id, value, level):
+        solver = self.solver
+        self.assignment[var] = value
+        solver.levels[var] = level
+        solver.decisions.append((var, word_id))
+        solver.order.assign(var)
+        solver._set_domain(var, 1 << word_id) # this var must be this word
+
+    def _retreat(self, failed):
+        '''
+        takes back the word of the top frame, it failed because of the `failed` levels.
+        with backjumping a frame whose level isn't in there gets popped as well, trying
+        its next word can't fix the failure, so the search lands on the latest culprit
+        '''
+        solver = self.solver
+        stack = self.stack
+        while stack:
+            frame = stack[-1]
+            var, _, word_id, _, _ = frame
+            level = len(stack)
+            bit = 1 << level
+
+            self._take_back(frame)
+            solver.backtracks += 1
+
+            if solver.backjump and not failed & bit:
+                # the failure doesn't depend on var at all, no other word of var can help
+                solver.backjumps += 1
+                stack.pop()
+                continue
+
+            failed &= ~bit
+            frame[3] |= failed
+            if solver.nogood_limit and not failed & NOT_LEARNED:
+                solver._learn(var, word_id, failed)
+            return
+        solver.conflict = failed
+
+    def _probe(self):
+        solver = self.solver
+        return solver.probe(solver.probe_limit, solver.probe_timeout)
+
+    def _take_back(self, frame):
+        '''unassigns the word the top frame is trying, its domain changes r undone'''
+        solver = self.solver
+        var = frame[0]
+        del self.assignment[var]
+        del solver.levels[var]
+        solver.decisions.pop()
+        solver.undo(frame[4])
+        solver.order.unassign(var)
+        frame[4] = None
+
+    def _restart(self):
+        '''starts the search over, False when probing found out there is no fill'''
+        solver = self.solver
+        self.reset()
+        if solver.probe_limit != 0 and self.propagate:
+            # another probing pass at the root, what it drops stays dropped after later resets
+            if not self._probe():
+                return False
+            self.root = solver.trail_mark()
+        solver.restarts += 1
+        # from now on ties and values come in random order, the weights and nogoods stay
+        solver.shuffle_values = True
+        solver.order.rnd = solver.random
+        solver.order.reset_ties()
+        solver.restart_at = solver.backtracks + next(self.cutoffs)
+        return True
+
+    def reset(self):
+        '''drops every level, the domains go back to the way they were after the initial ac3'''
+        solver = self.solver
+        if self.root is not None:
+            solver.undo(self.root)
+        for var, *_ in self.stack:
+            if var in solver.levels:
+                del self.assignment[var]
+                solver.order.unassign(var)
+        self.stack.clear()
+        solver.levels.clear()
+        solver.decisions.clear()
+        solver.conflict = 0
+        self.opening = True
+
+    def close(self):
+        '''gives the search state back, the solver is left the way the initial ac3 left it'''
+        self.reset()
+        self.status = "exhausted"
+        self.solver.restart_at = None
+
+    def checkpoint(self):
+        '''
+        json ready snapshot of the search: the path (every frame with the words it has left), the
+        counters, the constraint weights, the learned nogoods, the words probing dropped and
+        the random state.
+        Search.restore() on a solver for the same grid and dictionary continues from it
+        '''
+        solver = self.solver
+        ids = solver.crossword.variable_ids
+        version, state, gauss = solver.random.getstate()
+        return {
+            "status": self.status,
+            "opening": self.opening,
+            "frames": [
+                [ids[var], format(remaining, "x"), word_id, conflict, mark is not None]
+                for var, remaining, word_id, conflict, mark in self.stack
+            ],
+            "counters": {
+                "nodes": solver.nodes, "backtracks": solver.backtracks,
+                "backjumps": solver.backjumps, "restarts": solver.restarts,
+            },
+            "restart_in": None if solver.restart_at is None else solver.restart_at - solver.backtracks,
+            "shuffle_values": solver.shuffle_values,
+            "ties": [solver.order.ties[var] for var in solver.crossword.variable_list],
+            "weights": [
+                [ids[x], ids[y], weight]
+                for (x, y), weight in solver.order.weights.items() if weight != 1
+            ],
+            "nogoods": [
+                [ids[var], word_id, [[ids[other], other_id] for other, other_id in rest]]
+                for var, word_id, rest in solver.learned_nogoods()
+            ],
+            "probe_removed": [[ids[var], word_id] for var, word_id in solver.probe_removed],
+            "random": [version, list(state), gauss],
+        }
+
+    @classmethod
+    def restore(cls, solver, snapshot):
+        '''
+        a Search on a fresh `solver` that carries on from `snapshot` (see checkpoint)
+        the path is replayed word by word with ac3, so the domains come out the same
+        '''
+        variables = solver.crossword.variable_list
+        order = solver.order
+
+        for key, value in snapshot["counters"].items():
+            setattr(solver, key, value)
+        solver.shuffle_values = snapshot["shuffle_values"]
+        version, state, gauss = snapshot["random"]
+        solver.random.setstate((version, tuple(state), gauss))
+        if solver.restarts:
+            order.rnd = solver.random
+
+        for x_id, y_id, weight in snapshot["weights"]:
+            order.weights[order._constraint(variables[x_id], variables[y_id])] = weight
+        for var in variables:
+            order.weighted_degree[var] = sum(
+                order.weights[order._constraint(var, neighbor)]
+                for neighbor in solver.crossword.neighbors(var)
+            )
+        for var_id, word_id, rest in snapshot["nogoods"]:
+            solver._store_nogood(
+                variables[var_id], word_id, tuple((variables[other], other_id) for other, other_id in rest)
+            )
+
+        search = cls(solver)
+        if snapshot["status"] == "new":
+            return search
+        if not search._start():
+            return search
+        # the passes after restarts aren't run again, their drops r put back directly
+        dropped = set(map(tuple, snapshot.get("probe_removed", ()))) - {
+            (solver.crossword.variable_ids[var], word_id) for var, word_id in solver.probe_removed
+        }
+        if dropped:
+            for var_id, word_id in sorted(dropped):
+                var = variables[var_id]
+                solver.probe_removed.append((var, word_id))
+                solver._set_domain(var, solver.domains[var] & ~(1 << word_id))
+            if not solver.ac3():
+                raise ValueError("Checkpoint doesn't fit this grid and dictionary")
+            search.root = solver.trail_mark()
+        if snapshot["restart_in"] is not None:
+            search.cutoffs = islice(search.cutoffs, solver.restarts, None)
+            solver.restart_at = solver.backtracks + snapshot["restart_in"]
+        order.ties = dict(zip(variables, snapshot["ties"]))
+        order.rebuild()
+
+        for level, (var_id, remaining, word_id, conflict, active) in enumerate(snapshot["frames"], 1):
+            var = variables[var_id]
+            frame = [var, int(remaining, 16), word_id, conflict, None]
+            search.stack.append(frame)
+            if active:
+                frame[4] = solver.trail_mark()
+                search._assign(var, word_id, solver.fast_dict.words_of(var.length)[word_id], level)
+                if not solver.ac3([(n, var) for n in solver.crossword.neighbors(var)]):
+                    raise ValueError("Checkpoint doesn't fit this grid and dictionary")
+
+        search.opening = snapshot["opening"]
+        search.status = snapshot["status"]
+        return search
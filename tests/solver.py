@@ -1,36 +1,370 @@
 import sys
-from dictionary import FastDictionary
-from models import Crossword, Variable
-import copy
+import heapq
+import random
+import time
+from collections import deque
+from .dictionary import FastDictionary
+from .models import Crossword, Variable
+from .utils import iter_bits
+from .worklist import ArcQueue
+from .ordering import VariableOrder
+from .search import Search, SearchCancelled, BudgetExhausted, Restart
+from . import restarts as restart_schedules
+
+
 class Solver():
+
+    VARIABLE_HEURISTICS = VariableOrder.HEURISTICS
+    VALUE_ORDERS = ("static", "random", "lcv")
+
+    # nogoods with more slots than this r not stored, they almost never match again
+    NOGOOD_MAX_SIZE = 8
+
+    # ac3 looks at the clock once every this many arcs
+    DEADLINE_CHECK = 256
     
-    def __init__(self, crossword: Crossword , fast_dictionary : FastDictionary):
+    def __init__(self, crossword: Crossword , fast_dictionary : FastDictionary, arc_policy="fifo",
+                 var_heuristic="mrv", value_order="static", seed=None, stats=None, lcv_top_k=None,
+                 backjump=True, nogood_limit=0, restarts=None, restart_base=100, restart_factor=1.5,
+                 initial=None, probe_limit=0, probe_timeout=None):
        '''
        Initialise the CSP solver with a crossword structure and the 
        dictionary engine
 
+       arc_policy picks the order ac3 works through its queue, see ArcQueue.POLICIES
+       var_heuristic: "mrv", "mrv+degree", "dom/deg" or "dom/wdeg", see tests/ordering.py
+       value_order: "static" (word id order), "random" (shuffled with `seed`) or "lcv"
+       (least constraining value first, see order_domain_values)
+       lcv_top_k: with "lcv" only the best k values get sorted, the rest follow in id order
+       seed: seeds the tie breaks and the random value order, so a run can be repeated
+       backjump: on a dead end jump straight back to the most recent assignment that caused
+       it instead of the previous one (conflict-directed backjumping, see backtrack)
+       nogood_limit: how many learned nogoods to keep, 0 turns nogood learning off
+       restarts: None, "luby" or "geometric", see tests/restarts.py. the search starts over
+       every time a run hits its cutoff (restart_base backtracks times the schedule), later
+       runs break ties and order values at random. constraint weights and nogoods r kept
+       stats: optional SearchStats, see tests/stats.py (no stats means no overhead at all)
+       initial: a snapshot() of another solver on the same crossword to start from instead of
+       the full length buckets (see tests/gridcache.py)
+       probe_limit: words tried per probing pass before the search and after every restart
+       (see probe), 0 turns probing off and None probes until nothing more fails
+       probe_timeout: seconds per probing pass, None for no time limit
+
        creates the domain for every possible word for every slot on the on the board
        if lets say a Var is  len 3 then __init__ asks FastDictionary to return all the possible 
        3 letter words and adds them to the domain of that variable  
+
+       a domain is not a set of strings, it is an int bitmask over the word ids of that
+       length bucket (see FastDictionary.pattern_masks), so pruning is an AND and
+       emptiness / size checks r just `mask == 0` / `mask.bit_count()`
        '''
 
     # ini the domains using the dict engine
     # we query the dict for each var length 
     # passing an empty dict {} as requirement returns every word in the set
+       if value_order not in self.VALUE_ORDERS:
+           raise ValueError(f"Unknown value order {value_order!r}, expected one of {self.VALUE_ORDERS}")
+
        self.crossword = crossword
        self.fast_dict = fast_dictionary
+       # words added or removed after this show up as a newer fast_dict.version, see is_stale
+       self.dictionary_version = fast_dictionary.version
+       self.var_heuristic = var_heuristic
+       self.value_order = value_order
+       self.lcv_top_k = lcv_top_k
+       self.seed = seed
+       self.random = random.Random(seed)
+
+       self.best_score = None # total score of the best fill solve_best() found
+
+       # search counters, and an optional callable polled during the search, when it
+       # returns True backtrack raises SearchCancelled (used to cancel portfolio workers)
+       self.nodes = 0
+       self.backtracks = 0
+       self.stop_check = None
+
+       # budgets of the current solve() call and the restart state, see _check_limits
+       # status is how the last solve() ended: "solved", "unsatisfiable", or when it ran out
+       # of budget before it could tell, "timeout" / "node_limit"
+       if restarts is not None and restarts not in restart_schedules.SCHEDULES:
+           raise ValueError(f"Unknown restart schedule {restarts!r}, expected one of {restart_schedules.SCHEDULES}")
+       self.restart_schedule = restarts
+       self.restart_base = restart_base
+       self.restart_factor = restart_factor
+       self.deadline = None
+       self.node_limit = None
+       self.restart_at = None
+       self.restarts = 0
+       self.shuffle_values = False
+       self.status = None
 
         #this does the word enforce_node_consistency and keeps those words in set that have the same len as the target var
-       self.domains = {
-          var: self.fast_dict.get_matches(var.length, {}) # returns words for a specific length, returns the set of words
-          for var in self.crossword.variables
-       }
+       if initial is None:
+           self.domains = {
+              var: self.fast_dict.length_mask(var.length) # mask with every word of that length
+              for var in self.crossword.variables
+           }
+       else:
+           self.domains = dict(initial["domains"])
+
+       # True once the domains r arc consistent, so the search can skip its initial ac3
+       self.propagated = initial is not None and initial["propagated"]
 
        # if any var's domain is empty at the start it means the dictionary doesn't have words for this length
        for var, domain in self.domains.items():
            if not domain:
-               print(f'Warning: No words found for variable {var} with length {var.length}')
+               print(f'Warning: No words found for variable {var} with length {var.length}', file=sys.stderr)
+
+       # heap of the unassigned variables, kept up to date by _write_domain and backtrack
+       self.order = VariableOrder(self, var_heuristic, self.random if seed is not None else None)
+
+       # support counts for every arc (x, y): how many words still in domains[y] put each char
+       # at the crossing. a char whose count drops to 0 can't be supported by y anymore, so
+       # every x word with that char at the crossing goes into unsupported[x, y]
+       self.supports = dict()
+       self.unsupported = dict()
+       if initial is None:
+           for x in self.crossword.variables:
+               for y, x_index, y_index in self.crossword.crossings(x):
+                   self._init_supports(x, y, x_index, y_index)
+       else:
+           self.supports = {arc: dict(counts) for arc, counts in initial["supports"].items()}
+           self.unsupported = dict(initial["unsupported"])
+
+       # conflict explanations for backjumping: every assigned var has a decision level
+       # (levels[var], 1 for the first assignment) and explain[var] is a bitmask of the
+       # levels whose assignments removed words from var's domain so far
+       self.backjump = backjump
+       self.levels = dict()
+       self.decisions = [] # (var, word_id) per level, decisions[level - 1]
+       self.explain = {var: 0 for var in self.crossword.variables}
+       self.conflict = 0 # levels behind the last failure (a wipe-out or a dead end)
+       self.backjumps = 0
+
+       # learned nogoods: (var, word_id) -> list of the other (slot, word id) pairs it fails with
+       # the oldest go first once there r more than nogood_limit of them
+       self.nogood_limit = nogood_limit
+       self.nogoods = dict()
+       self.nogood_queue = deque()
+       self.nogood_hits = 0
+
+       # undo log for the domains: every change pushes (var, mask, explain before the change)
+       # backtracking pops back to a saved mark instead of copying every domain per node
+       self.trail = []
+       self.trail_max_depth = 0
+       self.trail_undone = 0
+
+       # ac3 counters: last_ac3 is the most recent call, ac3_totals adds up every call
+       self.arc_policy = arc_policy
+       self.last_ac3 = {"arcs": 0, "revisions": 0, "duplicates": 0}
+       self.ac3_totals = {"calls": 0, "arcs": 0, "revisions": 0, "duplicates": 0}
+
+       # failed value probing: probed holds the (var, word id) that passed a probe since the
+       # last removal, probe_removed every word probing took out, probe_totals the counters
+       self.probe_limit = probe_limit
+       self.probe_timeout = probe_timeout
+       self.probed = set()
+       self.probe_removed = []
+       self.probe_totals = {"passes": 0, "probes": 0, "removed": 0, "seconds": 0.0}
+
+       # letters placed in the structure file cut the domains down before any ac3
+       # (a lettered cell outside every slot constrains nothing), every applied letter is
+       # kept in self.letters so refresh() can put them back
+       self.letters = dict()
+       letters = {cell: char for cell, char in crossword.letters.items() if cell in crossword.cell_slots}
+       if letters:
+           self.apply_letters(letters)
+
+       self.stats = stats
+       if stats is not None:
+           stats.attach(self)
+
+    def snapshot(self):
+        '''
+        copy of the domains and support counts, Solver(..., initial=snapshot) starts from it.
+        only meant for a solver with nothing assigned (e.g. right after the initial ac3)
+        '''
+        return {
+            "domains": dict(self.domains),
+            "supports": {arc: dict(counts) for arc, counts in self.supports.items()},
+            "unsupported": dict(self.unsupported),
+            "propagated": self.propagated,
+        }
+
+    def apply_letters(self, letters : dict):
+        '''
+        fixes letters in the grid before the search, `letters` is {(i, j): char}
+        every slot through a lettered cell keeps only the words with those letters (one
+        pattern query per slot, FastDictionary.match_mask), then ac3 runs from just the
+        slots that changed when the domains were already arc consistent
+        the letters of the structure file (crossword.letters) r applied by __init__
+        returns False when some slot has no word left, raises ValueError for a locked word
+        (every cell lettered) that isn't in the dictionary
+        '''
+        if self.is_stale() and not self.levels:
+            self.refresh()
+
+        requirements = dict()
+        for cell, char in letters.items():
+            slots = self.crossword.cell_slots.get(cell)
+            if slots is None:
+                raise ValueError(f"Cell {cell} is not part of any slot")
+            for var_id, index in slots:
+                requirements.setdefault(self.crossword.variable_list[var_id], dict())[index] = char.upper()
+
+        self.letters.update((cell, char.upper()) for cell, char in letters.items())
+        changed = []
+        for var, requirement in requirements.items():
+            matches = self.fast_dict.match_mask(var.length, requirement)
+            if not matches and len(requirement) == var.length:
+                word = "".join(requirement[k] for k in range(var.length))
+                raise ValueError(f"Locked word {word} at {var} is not in the dictionary")
+            domain = self.domains[var]
+            restricted = domain & matches
+            if restricted != domain:
+                self._set_domain(var, restricted)
+                changed.append(var)
+            if not restricted:
+                self.propagated = False
+                return False
+
+        if not self.propagated or not changed:
+            # without consistent domains to start from the search's initial ac3 does it all
+            return True
+        # only the arcs into the slots that lost words can have anything to revise
+        # (propagated is off until it is done, ac3 can stop halfway on the time budget)
+        self.propagated = False
+        self.propagated = self.ac3([(n, var) for var in changed for n in self.crossword.neighbors(var)])
+        return self.propagated
+
+    def is_stale(self):
+        '''
+        True when the dictionary changed (add_words / remove_words) since this solver was
+        made, its domains and support counts were built from the older word set
+        '''
+        return self.fast_dict.version != self.dictionary_version
 
+    def refresh(self):
+        '''
+        brings a stale solver up to the current word set, between searches (nothing assigned).
+        the domains start over from the live length masks with self.letters applied again,
+        the support counts r made again (a new word can bring a char a position never had)
+        and the next search runs its full ac3. learned nogoods r dropped, a new word can
+        complete what used to fail. every search start calls this when is_stale()
+        '''
+        self.dictionary_version = self.fast_dict.version
+        self.domains = {
+            var: self.fast_dict.length_mask(var.length)
+            for var in self.crossword.variables
+        }
+        self.explain = {var: 0 for var in self.crossword.variables}
+        self.trail = []
+        self.propagated = False
+        self.probed.clear()
+        self.probe_removed = []
+        self.nogoods.clear()
+        self.nogood_queue.clear()
+
+        for x in self.crossword.variables:
+            for y, x_index, y_index in self.crossword.crossings(x):
+                self._init_supports(x, y, x_index, y_index)
+        self.order.rebuild()
+
+        letters, self.letters = self.letters, dict()
+        if letters:
+            self.apply_letters(letters)
+
+    def _init_supports(self, x: Variable, y: Variable, x_index: int, y_index: int):
+        '''counts the supports of arc (x, y) from scratch out of the current domains'''
+        y_domain = self.domains[y]
+        y_letters = self.fast_dict.position_masks(y.length, y_index)
+
+        counts = {
+            char: (y_domain & y_mask).bit_count()
+            for char, y_mask in y_letters.items()
+        }
+        unsupported = 0
+        for char, x_mask in self.fast_dict.position_masks(x.length, x_index).items():
+            if not counts.get(char):
+                unsupported |= x_mask
+
+        self.supports[x, y] = counts
+        self.unsupported[x, y] = unsupported
+
+    def _set_domain(self, var: Variable, mask: int, reason: int = 0):
+        '''
+        records the old domain of var on the trail and then writes the new one
+
+        reason: levels of the assignments that made the removed words impossible, they
+        join explain[var]
+        '''
+        self.trail.append((var, self.domains[var], self.explain[var]))
+        if len(self.trail) > self.trail_max_depth:
+            self.trail_max_depth = len(self.trail)
+        self.explain[var] |= reason
+        self._write_domain(var, mask)
+
+    def trail_mark(self):
+        '''position on the trail to come back to with undo()'''
+        return len(self.trail)
+
+    def undo(self, mark: int):
+        '''pops the trail back to `mark`, putting back every domain that changed since then'''
+        trail = self.trail
+        self.trail_undone += len(trail) - mark
+        while len(trail) > mark:
+            var, mask, explain = trail.pop()
+            self.explain[var] = explain
+            self._write_domain(var, mask)
+
+    def trail_stats(self):
+        '''current and deepest trail size and how many entries were undone so far'''
+        return {
+            "depth": len(self.trail),
+            "max_depth": self.trail_max_depth,
+            "undone": self.trail_undone,
+        }
+
+    def _write_domain(self, var: Variable, mask: int):
+        '''
+        every change to a domain ends up here so the support counts of the arcs
+        pointing at `var` stay in sync. works both ways: words removed (pruning,
+        assigning) decrement counts, words put back (undo) increment them
+
+        only the chars of the words that changed r looked at, so the cost is
+        the alphabet times the degree of var, not the size of the domain
+        '''
+        old = self.domains[var]
+        removed = old & ~mask
+        added = mask & ~old
+        self.domains[var] = mask
+
+        for x, var_index, x_index in self.crossword.crossings(var):
+            counts = self.supports[x, var]
+            x_letters = self.fast_dict.position_masks(x.length, x_index)
+            unsupported = self.unsupported[x, var]
+
+            for char, var_mask in self.fast_dict.position_masks(var.length, var_index).items():
+                # a char added to the dictionary after the counts were made has none yet
+                count = counts.get(char, 0)
+                if removed and count:
+                    gone = (removed & var_mask).bit_count()
+                    if gone:
+                        count -= gone
+                        if not count:
+                            # the last word of var with this char went away
+                            unsupported |= x_letters.get(char, 0)
+                if added:
+                    back = (added & var_mask).bit_count()
+                    if back:
+                        if not count:
+                            unsupported &= ~x_letters.get(char, 0)
+                        count += back
+                counts[char] = count
+
+            self.unsupported[x, var] = unsupported
+
+        self.order.push(var)
 
 
     def revise(self, x: Variable, y: Variable):
@@ -53,38 +387,27 @@ class Solver():
         
         '''
 
-        revised = False
-         
-         # find the overlaps
-        overlaps = self.crossword.overlaps.get((x, y))
-        
         #if there is no overlap no constrains exist between them
-        if overlaps is None: return False
-
-        x_index, y_index = overlaps
+        if (x, y) not in self.unsupported: return False
 
-        #loop over  Variable X's domain
+        # no need to look at y's domain here, the support counts already know which of x's
+        # chars lost every partner in y (see _set_domain), so this is a single AND
+        x_domain = self.domains[x]
+        revised_domain = x_domain & ~self.unsupported[x, y]
 
-        for x_word in list(self.domains[x]):
-
-            #identify the char x_word puts at the meeting point
-            char_to_check = x_word[x_index]
-
-            # looping through y's domain, ; we r checking whether we have char to check y_index``
-
-            possible_matches_for_y = self.fast_dict.get_matches(
-                y.length,
-                {y_index: char_to_check}
-            )
-
-            #pruning
-            # if the engine finds an empty set it means no words for Y can ever satisfy the constraint created by this specific x_word
-            if not possible_matches_for_y:
-                self.domains[x].remove(x_word)
-                revised = True
+        #pruning
+        if revised_domain == x_domain:
+            return False
 
+        # x lost those words because of what is left in y: whatever shrank y, plus y's
+        # own assignment if it has one
+        reason = self.explain[y]
+        level = self.levels.get(y)
+        if level is not None:
+            reason |= 1 << level
 
-        return revised
+        self._set_domain(x, revised_domain, reason)
+        return True
 
     def ac3(self, arcs=None):
         '''
@@ -97,40 +420,275 @@ class Solver():
         - so since X's domain is changed it checks to see if Var Z's domain (which overlaps var x on the crossword)
 
         '''
+        queue = ArcQueue(self.arc_policy, lambda var: self.domains[var].bit_count())
+
         if arcs is None:
-            queue = []
-            
             #we need to add every pair of variables that overlap
-            for v1 in self.crossword.variables:
+            for v1 in self.crossword.variable_list:
                 for v2 in self.crossword.neighbors(v1):
-                    queue.append((v1, v2))
-
-
+                    queue.push((v1, v2))
         else:
-            queue = list(arcs)
+            queue.extend(arcs)
 
+        processed = 0
+        revisions = 0
+        consistent = True
+        deadline = self.deadline
 
         while queue:
-            # taking the first arc (X, y) from the queue
-            x, y = queue.pop(0)
+            # one call on a big grid can take a while, so the time budget of solve() is
+            # looked at in here too. what is revised so far stays (it is still sound), the
+            # search takes back a half propagated word (see Search._advance)
+            if deadline is not None and not processed % self.DEADLINE_CHECK and time.monotonic() > deadline:
+                self._count_ac3(processed, revisions, queue.duplicates)
+                self.status = "timeout"
+                raise BudgetExhausted("timeout")
+
+            # taking the next arc (X, y) from the queue
+            x, y = queue.pop()
+            processed += 1
 
             if self.revise(x, y): #calling fast dictionary under the hood
+                 revisions += 1
                 # if x has no words left then return false
-                 if len(self.domains[x]) == 0:
-                     return False
+                 if not self.domains[x]:
+                     self.conflict = self.explain[x]
+                     self.order.wipeout(x, y)
+                     consistent = False
+                     break
                  
                  #since x's domain has changed, any neighbor z might be inconsistent with the 
-                #  new similar domain of X
+                #  new similar domain of X, arcs that r already waiting r skipped by the queue
                  for z in self.crossword.neighbors(x):
                     if z != y:
-                        queue.append((z, x))
-        return True
+                        queue.push((z, x))
+
+        self._count_ac3(processed, revisions, queue.duplicates)
+        return consistent
+
+    def _count_ac3(self, processed, revisions, duplicates):
+        self.last_ac3 = {"arcs": processed, "revisions": revisions, "duplicates": duplicates}
+        totals = self.ac3_totals
+        totals["calls"] += 1
+        totals["arcs"] += processed
+        totals["revisions"] += revisions
+        totals["duplicates"] += duplicates
     
-    def solve(self):
-        '''Initializes the solving process'''
-        self.ac3() #ini consistency check
-        return self.backtrack(dict())
-        
+    def probe(self, limit=None, timeout=None):
+        '''
+        failed value probing, the domains must be arc consistent and nothing assigned
+        every word of every slot (smallest domains first) is tried on its own: assign it,
+        ac3 from its neighbors, undo. a word that wipes out some domain can't be in any fill,
+        so it is dropped for good and ac3 runs on the spot. once a full round drops nothing
+        the domains r singleton arc consistent. failed probes bump the dom/wdeg weights like
+        any other wipe-out
+
+        limit: most words to try, timeout: seconds. a pass that runs out of either just
+        stops, words that already passed r skipped next time (until something gets
+        dropped), so passes after restarts carry on where this one left off. the search
+        budget (deadline, stop_check) cuts a pass short as well
+        returns False when some domain ends up empty (there is no fill)
+        '''
+        start = time.perf_counter()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self.deadline is not None:
+            deadline = self.deadline if deadline is None else min(deadline, self.deadline)
+        totals = self.probe_totals
+        totals["passes"] += 1
+        probes = 0
+        neighbors = self.crossword.neighbors
+
+        try:
+            while True:
+                dropped = False
+                variables = sorted(
+                    (var for var in self.crossword.variable_list if var not in self.levels),
+                    key=lambda var: self.domains[var].bit_count()
+                )
+                for var in variables:
+                    arcs = [(n, var) for n in neighbors(var)]
+                    for word_id in list(iter_bits(self.domains[var])):
+                        domain = self.domains[var]
+                        if domain == 1 << word_id:
+                            break # the last word left, ac3 already agrees with it
+                        if not domain >> word_id & 1 or (var, word_id) in self.probed:
+                            continue
+                        if limit is not None and probes >= limit:
+                            return True
+                        if deadline is not None and time.monotonic() > deadline:
+                            return True
+                        if self.stop_check is not None and self.stop_check():
+                            return True
+
+                        probes += 1
+                        mark = self.trail_mark()
+                        self._set_domain(var, 1 << word_id)
+                        try:
+                            consistent = self.ac3(arcs)
+                        finally:
+                            self.undo(mark)
+                        if consistent:
+                            self.probed.add((var, word_id))
+                            continue
+
+                        dropped = True
+                        totals["removed"] += 1
+                        self.probe_removed.append((var, word_id))
+                        self._set_domain(var, domain & ~(1 << word_id))
+                        if not self.ac3(arcs):
+                            return False
+
+                if not dropped:
+                    return True
+                # words that passed before the drops may not anymore
+                self.probed.clear()
+        finally:
+            totals["probes"] += probes
+            totals["seconds"] += time.perf_counter() - start
+
+    def solve(self, timeout=None, node_limit=None):
+        '''
+        Initializes the solving process
+
+        returns the filled assignment or None, self.status says which None it is:
+        "unsatisfiable", or "timeout" / "node_limit" when the search ran out of budget first
+        (the puzzle might still have a fill)
+
+        timeout: wall clock seconds for the whole call
+        node_limit: most search nodes for the whole call, restarts included
+        '''
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.node_limit = None if node_limit is None else self.nodes + node_limit
+
+        search = Search(self)
+        try:
+            assignment = search.run()
+            self.status = "unsatisfiable" if search.status == "exhausted" else search.status
+            # the fill is handed out as a copy: the search gives its levels back whatever
+            # happened, so the solver can solve() / count_solutions() again afterwards
+            return None if assignment is None else dict(assignment)
+        finally:
+            search.close()
+            # the budgets belong to this call, ac3 outside of it must not run into them
+            self.deadline = None
+            self.node_limit = None
+
+    def solutions(self, limit=None, timeout=None, node_limit=None):
+        '''
+        generator over the distinct fills of the grid, each one is found when the next one
+        is asked for. stopping the iteration (break, close()) takes the search state back
+
+        limit: most fills to yield
+        timeout / node_limit: budget for the whole enumeration, like solve()
+        self.status once it ends: "exhausted" (every fill was found), "limit", "timeout",
+        "node_limit", or "closed" when the caller stopped early
+        '''
+        for assignment in self._fills(limit, timeout, node_limit):
+            yield dict(assignment)
+
+    def count_solutions(self, limit=None, timeout=None, node_limit=None):
+        '''number of fills (up to `limit`), no assignment is kept, self.status as in solutions()'''
+        count = 0
+        for _ in self._fills(limit, timeout, node_limit):
+            count += 1
+        return count
+
+    def has_unique_fill(self, timeout=None, node_limit=None):
+        '''True when the grid has exactly one fill, None if the budget ran out before that was clear'''
+        count = self.count_solutions(2, timeout, node_limit)
+        if count == 2:
+            return False
+        if self.status == "exhausted":
+            return count == 1
+        return None
+
+    def solve_best(self, timeout=None, node_limit=None):
+        '''
+        the fill with the highest total word score (FastDictionary.scores_of), by branch and
+        bound: after every fill the search goes on, but only below nodes whose optimistic
+        bound (score_bound) beats the best fill so far
+
+        anytime: when the budget runs out the best fill found until then is returned
+        self.status: "optimal" (nothing better exists), "unsatisfiable", or "timeout" /
+        "node_limit" (self.best_score is that of the returned fill, None without one)
+        '''
+        self.best_score = None
+        best = None
+
+        def prune(assignment):
+            return self.best_score is not None and self.score_bound() <= self.best_score
+
+        for assignment in self._fills(None, timeout, node_limit, prune):
+            # every fill that gets through the bound beats the last one
+            best = dict(assignment)
+            self.best_score = self.fill_score(best)
+
+        if self.status == "exhausted":
+            self.status = "optimal" if best is not None else "unsatisfiable"
+        return best
+
+    def fill_score(self, assignment):
+        '''summed word score of an assignment'''
+        return sum(self.fast_dict.word_score(var.length, word) for var, word in assignment.items())
+
+    def score_bound(self):
+        '''
+        best total any fill below the current node can reach: the best word left in every
+        domain (an assigned slot's domain is just its word). ids go best score first, so
+        that's mostly the lowest set bit of each domain (see FastDictionary.best_score)
+        '''
+        bound = 0
+        for var, domain in self.domains.items():
+            if not domain:
+                return float("-inf")
+            bound += self.fast_dict.best_score(var.length, domain)
+        return bound
+
+    def _fills(self, limit, timeout, node_limit, prune=None):
+        '''yields the live search assignment at every new fill'''
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.node_limit = None if node_limit is None else self.nodes + node_limit
+        self.status = None
+
+        # a depth first search never reaches the same fill twice, a restarted one can,
+        # so only then the fills seen so far r remembered (as the tuple of their words)
+        seen = set() if self.restart_schedule is not None else None
+        variables = self.crossword.variable_list
+        search = Search(self)
+        search.prune = prune
+        found = 0
+        try:
+            while limit is None or found < limit:
+                assignment = search.run()
+                if assignment is None:
+                    self.status = search.status
+                    return
+                if seen is not None:
+                    key = tuple(assignment[var] for var in variables)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                found += 1
+                yield assignment
+            self.status = "limit"
+        finally:
+            search.close()
+            self.deadline = None
+            self.node_limit = None
+            if self.status is None:
+                self.status = "closed"
+
+    def _check_limits(self):
+        '''raises out of the search when it has to stop or start over, polled once per node and per word tried'''
+        if self.stop_check is not None and self.stop_check():
+            raise SearchCancelled()
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise BudgetExhausted("node_limit")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExhausted("timeout")
+        if self.restart_at is not None and self.backtracks >= self.restart_at:
+            raise Restart()
+
     def assignment_complete(self, assignment):
         '''checks if all the variables have been assigned to a word'''
         return len(assignment) == len(self.crossword.variables)
@@ -138,10 +696,59 @@ class Solver():
     def select_unassigned_variable(self, assignment):
         '''decides which empty slot to try to fill next. Uses MRV(Min remaining values) heuristic
         and it does this to remove identify and remove conflicts much more easily
+
+        the variables sit in a heap (self.order) keyed by the chosen heuristic, it is kept
+        up to date as domains change, so this is a pop and not a scan over every variable
+        '''
+        return self.order.select(assignment)
+
+    def order_domain_values(self, var, assignment, mask=None):
+        '''word ids of var's domain (or of `mask`, the words of it not tried yet) in the
+        order backtrack should try them. with the static order they come lazily, straight
+        off the mask, the other orders build the list
+
+        with "lcv" a word scores the number of words it leaves to its unassigned neighbors
+        the letter histogram at every crossing is already there: supports[var, n][char] is how
+        many words of n's domain have that char where n crosses var, so scoring a word is
+        one lookup per neighbor instead of comparing it against every neighbor word
+
+        after a restart the ids r shuffled first whatever the order, so "static" turns into
+        "random" and "lcv" breaks its ties at random (the sort is stable)
         '''
-        unassigned = [v for v in self.crossword.variables if v not in assignment]
-        # sort by domain size (MRV) min remaining value
-        return min(unassigned, key=lambda var: len(self.domains[var]))
+        if mask is None:
+            mask = self.domains[var]
+        if self.value_order == "static" and not self.shuffle_values:
+            return iter_bits(mask)
+        word_ids = list(iter_bits(mask))
+        if self.value_order == "random" or self.shuffle_values:
+            self.random.shuffle(word_ids)
+        elif self.value_order == "lcv" and len(word_ids) > 1:
+            histograms = [
+                (index, self.supports[var, neighbor])
+                for neighbor, index, _ in self.crossword.crossings(var)
+                if neighbor not in assignment
+            ]
+            matrix = self.fast_dict.matrix
+            if histograms and matrix is not None and len(word_ids) >= matrix.LCV_MIN_WORDS:
+                # the numpy backend scores the whole domain at once, same order as below
+                word_ids = matrix.lcv_order(
+                    var.length, self.fast_dict.words_of(var.length), word_ids, histograms, self.lcv_top_k
+                )
+            elif histograms:
+                words = self.fast_dict.words_of(var.length)
+
+                def score(word_id):
+                    word = words[word_id]
+                    return sum(counts.get(word[index], 0) for index, counts in histograms)
+
+                if self.lcv_top_k is None or self.lcv_top_k >= len(word_ids):
+                    word_ids.sort(key=score, reverse=True)
+                else:
+                    # partial sort, only the k best come first, the rest keep id order
+                    best = heapq.nlargest(self.lcv_top_k, word_ids, key=score)
+                    chosen = set(best)
+                    word_ids = best + [word_id for word_id in word_ids if word_id not in chosen]
+        return word_ids
     
     
     def consistent(self, word, var, assignment):
@@ -157,52 +764,103 @@ class Solver():
             return False
         
         #checking intersections with alr assigned neighbors 
-        for neighbor in self.crossword.neighbors(var):
+        for neighbor, x_index, y_index in self.crossword.crossings(var):
             if neighbor in assignment:
-                x_index, y_index = self.crossword.overlaps[var, neighbor]
                 if word[x_index] != assignment[neighbor][y_index]:
                     return False 
         return True
     
+    def _culprits(self, word, var, assignment):
+        '''levels of the assignments that make consistent(word, var, assignment) fail'''
+        culprits = [other for other, value in assignment.items() if value == word]
+        for neighbor, x_index, y_index in self.crossword.crossings(var):
+            if neighbor in assignment and word[x_index] != assignment[neighbor][y_index]:
+                culprits.append(neighbor)
+        return self._level_mask(culprits)
+
+    def _level_mask(self, variables):
+        mask = 0
+        for var in variables:
+            level = self.levels.get(var)
+            if level is not None:
+                mask |= 1 << level
+        return mask
+
+    def _nogood_conflict(self, var, word_id):
+        '''
+        levels of the assignments that together with var = word_id make up a learned
+        nogood, None when no stored nogood matches the current assignment
+        '''
+        levels = self.levels
+        decisions = self.decisions
+        for rest in self.nogoods.get((var, word_id), ()):
+            conflict = 0
+            for other, other_id in rest:
+                level = levels.get(other)
+                if level is None or decisions[level - 1][1] != other_id:
+                    break
+                conflict |= 1 << level
+            else:
+                self.nogood_hits += 1
+                return conflict
+        return None
+
+    def _store_nogood(self, var, word_id, rest):
+        self.nogoods.setdefault((var, word_id), []).append(rest)
+        self.nogood_queue.append((var, word_id))
+        if len(self.nogood_queue) > self.nogood_limit:
+            oldest = self.nogood_queue.popleft()
+            stored = self.nogoods[oldest]
+            stored.pop(0)
+            if not stored:
+                del self.nogoods[oldest]
+
+    def learned_nogoods(self):
+        '''(var, word_id, other (var, word_id) pairs) of every stored nogood, oldest first'''
+        seen = dict()
+        for key in self.nogood_queue:
+            index = seen.get(key, 0)
+            seen[key] = index + 1
+            yield key[0], key[1], self.nogoods[key][index]
+
+    def _learn(self, var, word_id, conflict):
+        '''
+        stores var = word_id together with the assignments at the `conflict` levels as a
+        nogood, that combination can't be part of any fill
+        '''
+        if conflict.bit_count() >= self.NOGOOD_MAX_SIZE:
+            return
+        rest = tuple(
+            self.decisions[level - 1]
+            for level in iter_bits(conflict)
+            if 0 < level <= len(self.decisions)
+        )
+        self._store_nogood(var, word_id, rest)
+
+    def nogood_stats(self):
+        return {"stored": len(self.nogood_queue), "limit": self.nogood_limit, "hits": self.nogood_hits}
+
     def backtrack(self, assignment):
-        '''main recursive search function, tries to fit in words and corrects them by backtracking the solution if it gets stuck
+        '''main search function, tries to fit in words and corrects them by backtracking the solution if it gets stuck
         
         for exp: 
         1. for slot 1 let's try 'CAT'
         2 Run ac3 -> it says if 'CAT' used then Slot 2 is possible
         3 Move to slot 2 -> 'Try' Cup
         4. of slot 3 becomes impossible -> go back to slot2 abd try a different word than 'CUP'
-        '''
-        #base case
-        if self.assignment_complete(assignment):
-            return assignment
-        
-        # selecting the next variable using MRV (min remaining value)
-        var = self.select_unassigned_variable(assignment)
-
-        #trying each word in the domain
-        for value in list(self.domains[var]):
-            if self.consistent(value, var, assignment):
-
-                domain_record = copy.deepcopy(self.domains)
-
-                #assign the word
-                assignment[var] = value
-                self.domains[var] = {value} # this var must be this word
-
-                # maintaining arc consistency
-                #seeing if this choice makes future slots impossible
-                if self.ac3([(n, var) for n in self.crossword.neighbors(var)]):
-                    result = self.backtrack(assignment)
-                    if result is not None:
-                        return result
-                    
-                
-                #backtrack
-                del assignment[var] #erases that option that makes it stuck
-                self.domains = domain_record # backtracks
 
-        return None
+        the search itself is a loop over an explicit stack (tests/search.py), not one call
+        per slot, so big grids don't run into the recursion limit
+
+        backjumping: every failure comes with the set of levels that caused it (self.conflict).
+        when a slot runs out of words it hands back the levels behind all of its failures, a
+        level that isn't in that set can't fix anything by trying its next word, so it gets
+        skipped and the search lands straight on the most recent culprit
+
+        starts from the current domains (ac3 is expected to have run), returns the full
+        assignment or None
+        '''
+        return Search(self, assignment, propagate=False).run()
 
 
 ''' BIGGER PICTURE
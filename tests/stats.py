@@ -0,0 +1,149 @@
+'''
+search statistics for Solver
+
+nothing in the solver checks for stats: SearchStats.attach() swaps the hot methods of
+one Solver instance for counting/timing wrappers. a Solver made without stats keeps
+its plain methods, so switching stats off costs nothing at all
+
+    stats = SearchStats(progress=print, progress_interval=5.0)
+    solver = Solver(crossword, fast_dict, stats=stats)
+    solver.solve()
+    stats.as_dict()
+'''
+
+import json
+import time
+
+
+class SearchStats():
+
+    # methods that get timed, phase name -> Solver method
+    # phases nest (ac3 time includes its revise calls), each is the total time inside that method
+    PHASES = {
+        "ac3": "ac3",
+        "revise": "revise",
+        "consistent": "consistent",
+        "undo": "undo",
+        "select_variable": "select_unassigned_variable",
+        "order_values": "order_domain_values",
+    }
+
+    def __init__(self, progress=None, progress_interval=1.0):
+        '''
+        progress: optional callable, gets as_dict() about every `progress_interval`
+        seconds while the search runs
+        '''
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.solver = None
+
+        self.words_pruned = 0
+        self.dict_queries = 0
+        self.cache_hits_before = 0
+        self.phase_times = {phase: 0.0 for phase in self.PHASES}
+        self.started = None
+        self.last_progress = None
+
+    def attach(self, solver):
+        '''installs the wrappers on `solver`, called by Solver.__init__ when it gets stats'''
+        self.solver = solver
+        self.cache_hits_before = solver.fast_dict.cache_hits
+        self.started = time.perf_counter()
+        self.last_progress = self.started
+
+        for phase, name in self.PHASES.items():
+            setattr(solver, name, self._timed(phase, getattr(solver, name)))
+
+        # revise is wrapped a second time to count the words it prunes
+        timed_revise = solver.revise
+
+        def revise(x, y):
+            before = solver.domains[x]
+            revised = timed_revise(x, y)
+            if revised:
+                self.words_pruned += (before & ~solver.domains[x]).bit_count()
+            return revised
+
+        solver.revise = revise
+
+        # the search polls _check_limits once per node and once per word tried, progress
+        # reports ride on that
+        check_limits = solver._check_limits
+
+        def check_progress():
+            if self.progress is not None and solver.nodes % 64 == 0:
+                now = time.perf_counter()
+                if now - self.last_progress >= self.progress_interval:
+                    self.last_progress = now
+                    self.progress(self.as_dict())
+            return check_limits()
+
+        solver._check_limits = check_progress
+        solver.fast_dict = CountingDictionary(solver.fast_dict, self)
+
+    def _timed(self, phase, method):
+        times = self.phase_times
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times[phase] += clock() - start
+
+        return timed
+
+    def as_dict(self):
+        '''every counter, ac3 and trail numbers of the solver included, as a plain dict'''
+        solver = self.solver
+        result = {
+            "elapsed": time.perf_counter() - self.started if self.started is not None else 0.0,
+            "nodes": 0,
+            "backtracks": 0,
+            "words_pruned": self.words_pruned,
+            "dict_queries": self.dict_queries,
+            "cache_hits": 0,
+            "phase_times": dict(self.phase_times),
+        }
+        if solver is not None:
+            result["value_order"] = solver.value_order
+            result["nodes"] = solver.nodes
+            result["backtracks"] = solver.backtracks
+            result["backjumps"] = solver.backjumps
+            result["nogoods"] = solver.nogood_stats()
+            result["probing"] = dict(solver.probe_totals)
+            # pattern cache hits of the dictionary since this solver was made
+            result["cache_hits"] = solver.fast_dict.cache_hits - self.cache_hits_before
+            result["ac3"] = dict(solver.ac3_totals)
+            result["trail"] = solver.trail_stats()
+        return result
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+
+class CountingDictionary():
+    '''stands in for the solver's FastDictionary and counts the index lookups going through it'''
+
+    QUERIES = (
+        "get_matches", "match_mask", "length_mask", "position_masks",
+        "pattern_mask", "words_of", "words_from_mask", "word_mask",
+        "any_match", "count_matches", "letters_at", "letter_counts", "scores_of",
+        "best_score",
+    )
+
+    def __init__(self, fast_dict, stats):
+        self.fast_dict = fast_dict
+        for name in self.QUERIES:
+            setattr(self, name, self._counted(getattr(fast_dict, name), stats))
+
+    @staticmethod
+    def _counted(method, stats):
+        def counted(*args, **kwargs):
+            stats.dict_queries += 1
+            return method(*args, **kwargs)
+        return counted
+
+    def __getattr__(self, name):
+        return getattr(self.fast_dict, name)
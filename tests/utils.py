@@ -0,0 +1,31 @@
+'''
+small helpers shared by the engine modules
+
+word ids inside a length bucket are bit positions, so a set of words of one
+length is just a python int. these helpers build and read those ints
+'''
+
+
+def mask_from_ids(ids, size):
+    '''
+    builds an int bitmask with the bits in `ids` set
+    goes through a bytearray so big buckets don't pay for one int copy per OR
+    '''
+    buffer = bytearray((size + 7) // 8)
+    for word_id in ids:
+        buffer[word_id >> 3] |= 1 << (word_id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def iter_bits(mask):
+    '''yields the positions of the set bits of `mask`, lowest first'''
+    if not mask:
+        return
+    # reading the binary string once is O(n) for the whole mask, peeling off the
+    # lowest bit with & -mask would be O(n) per word
+    bits = bin(mask)[:1:-1]
+    position = bits.find("1")
+    while position != -1:
+        yield position
+        position = bits.find("1", position + 1)
+
@@ -0,0 +1,134 @@
+'''
+streaming word list reader
+
+reads any mix of word list formats line by line, so a million entry list never sits in
+memory as text, only the words that come out of it:
+- plain lists, one word per line (like global.txt)
+- word,length csv (like data/words.csv), the length column is only checked for being a
+  number, the bucket comes from the word itself once it is normalised
+- word;score lists
+- any of those gzip compressed (spotted by the gzip magic bytes, not the file name)
+
+words r normalised (upper case, everything but letters dropped, so "rock 'n' roll"
+becomes ROCKNROLL) and deduplicated across every source, a word listed more than once
+keeps its best score. a line that doesn't parse (a header, a bad number) is skipped
+and counted
+
+    reader = WordListReader()
+    for path in paths:
+        reader.read(path)
+    reader.buckets, reader.scores, reader.stats()
+'''
+
+import gzip
+import io
+import time
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def normalise(word : str):
+    '''upper case letters only, "" when nothing is left'''
+    if word.isalpha():
+        return word.upper()
+    return "".join(char for char in word.upper() if char.isalpha())
+
+
+def open_text(path):
+    '''text handle on a word list, gunzipped on the fly when it is compressed'''
+    raw = open(path, "rb")
+    if raw.read(len(GZIP_MAGIC)) == GZIP_MAGIC:
+        raw.seek(0)
+        raw = gzip.GzipFile(fileobj=raw)
+    else:
+        raw.seek(0)
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+
+
+def parse_line(line : str):
+    '''
+    (raw word, score or None) out of one line, None for a line that has no word or whose
+    second column isn't a number
+    '''
+    line = line.strip()
+    if not line:
+        return None
+    if ";" in line:
+        word, _, score = line.partition(";")
+        try:
+            return word, float(score)
+        except ValueError:
+            return None
+    word, _, length = line.partition(",")
+    if length and not length.strip().isdigit():
+        return None
+    return word, None
+
+
+def iter_words(path):
+    '''(normalised word, score or None) for every usable line of one word list'''
+    with open_text(path) as file:
+        for line in file:
+            entry = parse_line(line)
+            if entry is None:
+                continue
+            word = normalise(entry[0])
+            if word:
+                yield word, entry[1]
+
+
+class WordListReader():
+
+    def __init__(self):
+        self.buckets = dict() #keys r ints vals r set of words
+        self.scores = dict() #normalised word -> best score it was given, unscored words r left out
+        self.sources = 0
+        self.lines = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    def read(self, path):
+        '''adds every word of one list, a line at a time'''
+        start = time.perf_counter()
+        buckets = self.buckets
+        scores = self.scores
+
+        with open_text(path) as file:
+            for line in file:
+                self.lines += 1
+                entry = parse_line(line)
+                word = normalise(entry[0]) if entry is not None else ""
+                if not word:
+                    self.skipped += 1
+                    continue
+
+                bucket = buckets.get(len(word))
+                if bucket is None:
+                    bucket = buckets[len(word)] = set()
+                if word in bucket:
+                    self.duplicates += 1
+                else:
+                    bucket.add(word)
+
+                score = entry[1]
+                if score is not None and score > scores.get(word, score - 1):
+                    scores[word] = score
+
+        self.sources += 1
+        self.seconds += time.perf_counter() - start
+
+    def words(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+    def stats(self):
+        '''counters of everything read so far, words_per_sec counts input lines'''
+        return {
+            "sources": self.sources,
+            "lines": self.lines,
+            "words": self.words(),
+            "duplicates": self.duplicates,
+            "skipped": self.skipped,
+            "seconds": self.seconds,
+            "words_per_sec": self.lines / self.seconds if self.seconds else None,
+        }
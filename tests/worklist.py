@@ -0,0 +1,75 @@
+import heapq
+from collections import deque
+
+
+class ArcQueue():
+    '''
+    worklist of arcs (x, y) for ac3
+
+    pops in O(1) (O(log n) for the smallest-domain policy) and keeps a membership
+    set so an arc that is already waiting isn't queued a second time
+
+    policies:
+    - "fifo": arcs come out in the order they went in (plain ac3)
+    - "recent": most recently queued arc first, so the neighbors of the var that
+       was just revised get looked at while its change is fresh
+    - "smallest-domain": arc whose x has the smallest domain first, small domains
+       r the ones most likely to wipe out so failures show up early
+    '''
+
+    POLICIES = ("fifo", "recent", "smallest-domain")
+
+    def __init__(self, policy="fifo", domain_size=None):
+        '''
+        domain_size: function var -> int, only needed for "smallest-domain"
+        '''
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown arc policy {policy!r}, expected one of {self.POLICIES}")
+        if policy == "smallest-domain" and domain_size is None:
+            raise ValueError("The smallest-domain policy needs a domain_size function")
+
+        self.policy = policy
+        self.domain_size = domain_size
+        self.queued = set()
+        self.pushed = 0
+        self.duplicates = 0
+
+        if policy == "smallest-domain":
+            self.heap = []
+        else:
+            self.arcs = deque()
+
+    def push(self, arc):
+        '''adds `arc` unless it is already waiting, returns True if it was added'''
+        if arc in self.queued:
+            self.duplicates += 1
+            return False
+
+        self.queued.add(arc)
+        self.pushed += 1
+        if self.policy == "smallest-domain":
+            # the size is read at push time, pushed is there to break ties in insertion order
+            heapq.heappush(self.heap, (self.domain_size(arc[0]), self.pushed, arc))
+        else:
+            self.arcs.append(arc)
+        return True
+
+    def extend(self, arcs):
+        for arc in arcs:
+            self.push(arc)
+
+    def pop(self):
+        if self.policy == "smallest-domain":
+            arc = heapq.heappop(self.heap)[2]
+        elif self.policy == "recent":
+            arc = self.arcs.pop()
+        else:
+            arc = self.arcs.popleft()
+        self.queued.discard(arc)
+        return arc
+
+    def __len__(self):
+        return len(self.queued)
+
+    def __bool__(self):
+        return bool(self.queued)
@@ -0,0 +1,37 @@
+'''
+shared helpers of the unit tests, the engine package is `tests` at the repo root (not a
+test suite), so the root goes on sys.path here and the tests live in unit_tests/
+
+    python -m pytest unit_tests
+'''
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.dictionary import FastDictionary  # noqa: E402
+
+from helpers import WORDS  # noqa: E402
+
+
+@pytest.fixture
+def write_grid(tmp_path):
+    '''write_grid(rows) -> path of a structure file with those rows'''
+    def write(rows, name="grid.txt"):
+        path = tmp_path / name
+        path.write_text("\n".join(rows) + "\n")
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def make_dictionary(tmp_path):
+    '''make_dictionary(lines) -> FastDictionary over a word list with those lines'''
+    def make(lines=WORDS, name="words.txt"):
+        path = tmp_path / name
+        path.write_text("\n".join(lines) + "\n")
+        return FastDictionary(str(path))
+    return make
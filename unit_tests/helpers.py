@@ -0,0 +1,71 @@
+'''word lists and brute force checks shared by the unit tests'''
+
+import os
+import random
+
+# 3 letter words that fill the 3x3 grid in a handful of ways
+WORDS = [
+    "ACE", "ADS", "AGE", "AID", "APE", "ARC", "ARE", "ART", "ATE", "BAD", "BAG", "BAR",
+    "BAT", "BED", "BEE", "BET", "CAB", "CAD", "CAR", "CAT", "DAB", "DEN", "DOE", "EAR",
+    "EAT", "EEL", "EGG", "ERA", "ICE", "ODE", "OAR", "RAT", "RED", "SEA", "TAR", "TEA",
+]
+
+
+def brute_force_fills(crossword, words):
+    '''
+    every fill of `crossword` with distinct words out of `words`, as {var: word}
+    plain generate and test, slot by slot, only the crossings with the slots before are
+    checked, no propagation, so it shares nothing with the solver
+    '''
+    variables = crossword.variable_list
+    by_length = {}
+    for word in set(words):
+        by_length.setdefault(len(word), []).append(word.upper())
+
+    fills = []
+    fill = {}
+
+    def extend(k):
+        if k == len(variables):
+            fills.append(dict(fill))
+            return
+        var = variables[k]
+        for word in by_length.get(var.length, []):
+            if word in fill.values():
+                continue
+            if all(
+                fill[other][j] == word[i]
+                for other, i, j in crossword.crossings(var) if other in fill
+            ):
+                fill[var] = word
+                extend(k + 1)
+                del fill[var]
+
+    extend(0)
+    return fills
+
+
+def as_key(assignment):
+    '''hashable form of a fill'''
+    return tuple(sorted((var.i, var.j, var.direction, word) for var, word in assignment.items()))
+
+
+def is_fill(crossword, assignment, fast_dict):
+    variables = crossword.variable_list
+    return (
+        set(assignment) == set(variables)
+        and len(set(assignment.values())) == len(variables)
+        and all(assignment[var] in fast_dict.words_of(var.length) for var in variables)
+        and all(
+            assignment[x][i] == assignment[y][j]
+            for x in variables for y, i, j in crossword.crossings(x)
+        )
+    )
+
+
+def sample_words(length, count, seed):
+    '''`count` words of this length out of data/words.csv, the same ones for the same seed'''
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "words.csv")
+    with open(path) as file:
+        words = sorted({line.split(",")[0].upper() for line in file if line.strip()})
+    return random.Random(seed).sample([word for word in words if len(word) == length], count)
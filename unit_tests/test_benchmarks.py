@@ -0,0 +1,43 @@
+import importlib.util
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+spec = importlib.util.spec_from_file_location("bench_run", os.path.join(ROOT, "benchmarks", "run.py"))
+bench_run = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_run)
+
+
+def grid(status="solved", **metrics):
+    result = {"status": status, "nodes": 100, "ac3_time": 0.002, "nodes_per_sec": 5000.0,
+              "time_to_first_solution": 0.004, "peak_rss_kb": 17000}
+    result.update(metrics)
+    return {"dictionaries": {}, "grids": {"g@words": result}}
+
+
+def test_millisecond_noise_is_not_a_regression():
+    baseline = grid()
+    results = grid(ac3_time=0.005, time_to_first_solution=0.0077, nodes_per_sec=4000.0, peak_rss_kb=18000)
+    assert bench_run.compare(results, baseline, 50) == ([], [])
+
+
+def test_nodes_and_status_gate_the_run():
+    regressions, _ = bench_run.compare(grid(nodes=151), grid(), 50)
+    assert regressions == [("g@words", "nodes", 100, 151)]
+    regressions, _ = bench_run.compare(grid(status="timeout"), grid(), 50)
+    assert [metric for _, metric, _, _ in regressions] == ["status"]
+    # nodes of a run that didn't finish say nothing
+    assert bench_run.compare(grid(status="timeout", nodes=10), grid(status="timeout"), 50) == ([], [])
+
+
+def test_timings_warn_unless_gated():
+    results = grid(time_to_first_solution=0.5)
+    regressions, warnings = bench_run.compare(results, grid(), 50)
+    assert not regressions and [metric for _, metric, _, _ in warnings] == ["time_to_first_solution"]
+    regressions, warnings = bench_run.compare(results, grid(), 50, set(bench_run.METRICS))
+    assert [metric for _, metric, _, _ in regressions] == ["time_to_first_solution"] and not warnings
+
+
+def test_median_of_runs():
+    runs = [{"status": "solved", "nodes": 7, "ac3_time": time} for time in (0.3, 0.1, 0.2)]
+    assert bench_run.median_of(runs)["ac3_time"] == 0.2
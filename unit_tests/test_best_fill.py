@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from tests.models import Crossword
+from tests.solver import Solver
+
+from helpers import WORDS, brute_force_fills, as_key, is_fill
+
+RING = ["___", "_#_", "___"]
+
+OPTIONS = [
+    dict(),
+    dict(nogood_limit=1000),
+    dict(var_heuristic="dom/wdeg", value_order="lcv", nogood_limit=1000),
+]
+
+
+def scored_words(seed):
+    '''WORDS as a word;score list with random scores'''
+    rnd = random.Random(seed)
+    return {word: rnd.randint(1, 60) for word in WORDS}
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("options", OPTIONS)
+def test_solve_best_matches_brute_force(write_grid, make_dictionary, options, seed):
+    scores = scored_words(seed)
+    fast_dict = make_dictionary([f"{word};{score}" for word, score in scores.items()])
+    crossword = Crossword(write_grid(RING))
+    best = max(
+        sum(scores[word] for word in fill.values())
+        for fill in brute_force_fills(crossword, WORDS)
+    )
+    solver = Solver(crossword, fast_dict, **options)
+
+    fill = solver.solve_best()
+    assert solver.status == "optimal"
+    assert is_fill(crossword, fill, fast_dict)
+    assert solver.best_score == solver.fill_score(fill) == best
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_bound_leaves_nothing_behind(write_grid, make_dictionary, options):
+    # the nodes the bound cuts off only lose against this call's best fill, the next
+    # search must see all of them again
+    scores = scored_words(0)
+    fast_dict = make_dictionary([f"{word};{score}" for word, score in scores.items()])
+    crossword = Crossword(write_grid(RING))
+    expected = len(brute_force_fills(crossword, WORDS))
+    solver = Solver(crossword, fast_dict, **options)
+
+    best = solver.solve_best()
+    assert as_key(solver.solve_best()) == as_key(best)
+    assert is_fill(crossword, solver.solve(), fast_dict)
+    assert solver.count_solutions() == expected
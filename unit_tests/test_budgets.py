@@ -0,0 +1,66 @@
+import itertools
+
+import pytest
+
+from tests import solver as solver_module
+from tests.gridcache import GridCache
+from tests.models import Crossword
+from tests.search import BudgetExhausted, Search
+from tests.solver import Solver
+
+from helpers import as_key, sample_words
+
+GRID_3X3 = ["___", "___", "___"]
+
+
+class FakeClock():
+    '''time.monotonic stand-in, every reading moves one second on'''
+
+    def __init__(self):
+        self.ticks = itertools.count()
+
+    def monotonic(self):
+        return float(next(self.ticks))
+
+
+def test_timeout_stops_the_initial_ac3(write_grid, make_dictionary):
+    solver = Solver(Crossword(write_grid(GRID_3X3)), make_dictionary(sample_words(3, 150, seed=4)))
+    assert solver.solve(timeout=0) is None
+    assert solver.status == "timeout"
+    assert solver.nodes == 0 and not solver.propagated
+    # nothing of the budget is left behind
+    assert solver.deadline is None
+    assert solver.solve() is not None and solver.status == "solved"
+
+
+@pytest.mark.parametrize("ticks", range(60, 200, 20))
+def test_timeout_inside_ac3_resumes_cleanly(write_grid, make_dictionary, monkeypatch, ticks):
+    fast_dict = make_dictionary(sample_words(3, 150, seed=4))
+    crossword = Crossword(write_grid(GRID_3X3))
+    straight = Solver(crossword, fast_dict)
+    reference = Search(straight).run()
+
+    clock = FakeClock()
+    monkeypatch.setattr(solver_module.Solver, "DEADLINE_CHECK", 1)
+    monkeypatch.setattr(solver_module, "time", clock)
+    solver = Solver(crossword, fast_dict)
+    search = Search(solver)
+    solver.deadline = ticks
+    stops = 0
+    while search.run() is None and search.status == "timeout":
+        stops += 1
+        solver.deadline = next(clock.ticks) + ticks
+    assert stops > 0
+    assert search.status == "solved"
+    assert as_key(search.assignment) == as_key(reference)
+    assert (solver.nodes, solver.backtracks) == (straight.nodes, straight.backtracks)
+
+
+def test_grid_cache_build_honours_timeout(write_grid, make_dictionary):
+    cache = GridCache(make_dictionary())
+    path = write_grid(GRID_3X3)
+    with pytest.raises(BudgetExhausted):
+        cache.solver(path, timeout=0)
+    assert cache.info()["entries"] == 0
+    assert cache.solver(path).solve() is None
+    assert cache.info()["entries"] == 1
@@ -0,0 +1,35 @@
+from helpers import WORDS
+
+
+def brute_matches(words, length, requirements):
+    return {
+        word for word in words
+        if len(word) == length
+        and all(i < length and word[i] == char for i, char in requirements.items())
+    }
+
+
+def test_pattern_queries_match_a_scan(make_dictionary):
+    fast_dict = make_dictionary()
+    for requirements in ({}, {0: "A"}, {1: "A"}, {0: "B", 2: "D"}, {2: "E"}, {0: "Z"}, {5: "A"}):
+        expected = brute_matches(WORDS, 3, requirements)
+        assert fast_dict.get_matches(3, requirements) == expected
+        assert fast_dict.count_matches(3, requirements) == len(expected)
+        assert fast_dict.words_from_mask(3, fast_dict.match_mask(3, requirements)) == sorted(
+            expected, key=fast_dict.word_ids[3].get
+        )
+
+
+def test_whole_length_query_is_cached(make_dictionary):
+    fast_dict = make_dictionary()
+    first = fast_dict.get_matches(3, {})
+    hits = fast_dict.cache_hits
+    assert fast_dict.get_matches(3, {}) is first
+    assert fast_dict.cache_hits == hits + 1
+
+    # a change to the words of that len makes the cached set stale
+    fast_dict.add_words(["ZAP"])
+    assert fast_dict.get_matches(3, {}) == first | {"ZAP"}
+    fast_dict.remove_words(["ACE", "ZAP"])
+    assert fast_dict.get_matches(3, {}) == first - {"ACE"}
+    assert fast_dict.get_matches(4, {}) == frozenset()
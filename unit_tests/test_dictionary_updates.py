@@ -0,0 +1,48 @@
+from tests.models import Crossword
+from tests.solver import Solver
+
+from helpers import WORDS, brute_force_fills, is_fill
+
+RING = ["___", "_#_", "___"]
+
+
+def test_new_letter_reaches_a_live_solver(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(RING))
+    solver = Solver(crossword, fast_dict)
+
+    # Q, Z and X show up at positions no word had before
+    fast_dict.add_words(["QZX"])
+    assert solver.is_stale()
+    assignment = solver.solve()
+    assert not solver.is_stale()
+    assert is_fill(crossword, assignment, fast_dict)
+    assert solver.count_solutions() == len(brute_force_fills(crossword, WORDS + ["QZX"]))
+
+
+def test_live_solver_follows_added_and_removed_words(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(RING))
+    solver = Solver(crossword, fast_dict)
+    assert solver.count_solutions() == len(brute_force_fills(crossword, WORDS))
+
+    removed = ["ACE", "BAD", "CAT", "EAR", "TEA"]
+    fast_dict.remove_words(removed)
+    words = [word for word in WORDS if word not in removed]
+    assert solver.count_solutions() == len(brute_force_fills(crossword, words))
+
+    added = ["TAB", "BOA", "AXE", "EXO"]
+    fast_dict.add_words(added)
+    words += added
+    fills = list(solver.solutions())
+    assert len(fills) == len(brute_force_fills(crossword, words))
+    assert all(is_fill(crossword, fill, fast_dict) for fill in fills)
+
+
+def test_refresh_keeps_letters(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(["B__", "_#_", "___"]))
+    solver = Solver(crossword, fast_dict)
+    fast_dict.add_words(["BOX"])
+    assignment = solver.solve()
+    assert all(word[0] == "B" for var, word in assignment.items() if (var.i, var.j) == (0, 0))
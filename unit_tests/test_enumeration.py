@@ -0,0 +1,55 @@
+import pytest
+
+from tests.models import Crossword
+from tests.solver import Solver
+
+from helpers import WORDS, brute_force_fills, as_key, is_fill, sample_words
+
+RING = ["___", "_#_", "___"]
+GRID_3X3 = ["___", "___", "___"]
+
+OPTIONS = [
+    dict(),
+    dict(backjump=False),
+    dict(nogood_limit=1000),
+    dict(var_heuristic="dom/wdeg", value_order="lcv", nogood_limit=50),
+    dict(restarts="luby", restart_base=20, seed=3, nogood_limit=1000),
+]
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_solutions_match_brute_force(write_grid, make_dictionary, options):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(RING))
+    expected = {as_key(fill) for fill in brute_force_fills(crossword, WORDS)}
+    solver = Solver(crossword, fast_dict, **options)
+
+    found = [as_key(fill) for fill in solver.solutions()]
+    assert solver.status == "exhausted"
+    assert len(found) == len(set(found)) and set(found) == expected
+    assert solver.count_solutions(limit=5) == 5 and solver.status == "limit"
+    assert solver.has_unique_fill() is False
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_enumeration_leaves_nothing_behind(write_grid, make_dictionary, options):
+    # every fill handed out counts as a failure to the search, none of them may stay
+    # behind as a nogood for the next call
+    fast_dict = make_dictionary(sample_words(3, 200, seed=0))
+    crossword = Crossword(write_grid(GRID_3X3))
+    solver = Solver(crossword, fast_dict, **options)
+
+    first = solver.count_solutions()
+    assert first > 0
+    assert solver.count_solutions() == first
+    assert is_fill(crossword, solver.solve(), fast_dict)
+    assert solver.status == "solved"
+
+
+def test_unique_fill(write_grid, make_dictionary):
+    words = ["ABC", "AXD", "DEF", "QRS"]
+    crossword = Crossword(write_grid(["___", "_##", "___"]))
+    assert len(brute_force_fills(crossword, words)) == 1
+    solver = Solver(crossword, make_dictionary(words))
+    assert solver.has_unique_fill() is True
+    assert solver.count_solutions() == 1
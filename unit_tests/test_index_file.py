@@ -0,0 +1,85 @@
+import pytest
+
+from tests.dictionary import FastDictionary
+from tests.index_file import compile_index
+from tests.models import Crossword
+from tests.solver import Solver
+
+from helpers import WORDS, as_key
+
+# mixed lengths, scores and a few words that share prefixes with others
+LINES = [f"{word};{len(word) + k % 7}" for k, word in enumerate(
+    WORDS + ["AB", "BA", "ABCD", "ABCE", "ZZZZ", "QUIZ", "EARS", "SEAT", "TEAS", "EASTER"]
+)]
+
+PATTERNS = [{}, {0: "A"}, {1: "E"}, {0: "B", 2: "D"}, {3: "Z"}, {0: "Q", 1: "U"}, {9: "A"}]
+
+
+@pytest.fixture
+def loaded(make_dictionary, tmp_path):
+    '''(dictionary read from the word list, the same one opened from a compiled index)'''
+    from_list = make_dictionary(LINES)
+    path = str(tmp_path / "words.fdix")
+    compile_index(from_list, path)
+    mapped = FastDictionary(path)
+    yield from_list, mapped
+    mapped.index.close()
+
+
+def test_index_round_trip(loaded):
+    from_list, mapped = loaded
+    assert mapped.index is not None
+    assert sorted(mapped.lengths()) == sorted(from_list.lengths())
+    for length in from_list.lengths():
+        assert list(mapped.words_of(length)) == from_list.words_of(length)
+        assert list(mapped.scores_of(length)) == from_list.scores_of(length)
+        assert mapped.length_mask(length) == from_list.length_mask(length)
+        for index in range(length):
+            assert mapped.position_masks(length, index) == from_list.position_masks(length, index)
+        for requirements in PATTERNS:
+            assert mapped.get_matches(length, requirements) == from_list.get_matches(length, requirements)
+            assert mapped.match_mask(length, requirements) == from_list.match_mask(length, requirements)
+
+
+def test_word_lookup_goes_through_the_mmap(loaded):
+    from_list, mapped = loaded
+    for length in from_list.lengths():
+        for word in from_list.words_of(length):
+            assert mapped.word_mask(length, word) == from_list.word_mask(length, word) != 0
+            assert mapped.word_score(length, word) == from_list.word_score(length, word)
+        for word in ("A" * length, "Z" * length, "ABCZ"[:length], "~" * length):
+            assert mapped.word_mask(length, word) == from_list.word_mask(length, word)
+    assert mapped.word_mask(3, "TOOLONG") == 0
+    # nothing per word is built up in the process for the file's own words
+    assert all(not ids for ids in mapped.word_ids.values())
+
+
+def test_updates_on_a_mapped_dictionary(loaded):
+    from_list, mapped = loaded
+    for dictionary in loaded:
+        assert dictionary.add_words(["ZAP", "ACE", ("ABCF", 9)]) == 2
+        assert dictionary.remove_words(["BAT", "ZAP", "NOPE"]) == 2
+        assert dictionary.add_words(["BAT"]) == 1
+    for length in (3, 4):
+        for requirements in PATTERNS:
+            assert mapped.get_matches(length, requirements) == from_list.get_matches(length, requirements)
+    assert mapped.word_mask(3, "ZAP") == 0 and mapped.word_mask(3, "BAT") != 0
+    assert mapped.word_score(4, "ABCF") == 9
+
+
+def test_solver_on_a_mapped_dictionary(loaded, write_grid):
+    crossword = Crossword(write_grid(["___", "_#_", "___"]))
+    fills = [
+        {as_key(fill) for fill in Solver(crossword, dictionary).solutions()}
+        for dictionary in loaded
+    ]
+    assert fills[0] and fills[0] == fills[1]
+
+
+def test_old_format_is_refused(loaded, tmp_path):
+    path = tmp_path / "old.fdix"
+    data = bytearray(open(loaded[1].index.path, "rb").read())
+    data[4:8] = (1).to_bytes(4, "little")
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="index format 1"):
+        FastDictionary(str(path))
@@ -0,0 +1,76 @@
+import pytest
+
+from tests.gridcache import GridCache
+from tests.models import Crossword, read_structure
+from tests.solver import Solver
+
+from helpers import WORDS, brute_force_fills, as_key
+
+RING = ["___", "_#_", "___"]
+
+
+def fills_with(crossword, letters):
+    '''brute force fills of the open grid that agree with `letters`'''
+    return {
+        as_key(fill) for fill in brute_force_fills(crossword, WORDS)
+        if all(
+            fill[var][k] == letters[cell]
+            for var in fill for k, cell in enumerate(var.cells) if cell in letters
+        )
+    }
+
+
+def test_read_structure(write_grid):
+    structure, letters = read_structure(write_grid(["a_#", "_B"]))
+    assert structure == [[True, True, False], [True, True, False]]
+    assert letters == {(0, 0): "A", (1, 1): "B"}
+
+
+@pytest.mark.parametrize("rows", [
+    ["B__", "_#_", "___"],
+    ["___", "_#_", "__t"],
+    ["C_T", "_#_", "___"],
+    ["ACE", "_#_", "___"],
+])
+def test_letters_restrict_the_fills(write_grid, make_dictionary, rows):
+    crossword = Crossword(write_grid(rows))
+    expected = fills_with(Crossword(write_grid(RING, "open.txt")), crossword.letters)
+    assert expected
+    solver = Solver(crossword, make_dictionary())
+    assert {as_key(fill) for fill in solver.solutions()} == expected
+    assert solver.letters == crossword.letters
+
+
+def test_letters_without_a_fill(write_grid, make_dictionary):
+    solver = Solver(Crossword(write_grid(["Q__", "_#_", "___"])), make_dictionary())
+    assert solver.solve() is None
+    assert solver.status == "unsatisfiable"
+
+
+def test_locked_word_not_in_the_dictionary(write_grid, make_dictionary):
+    crossword = Crossword(write_grid(["QZX", "_#_", "___"]))
+    with pytest.raises(ValueError, match="Locked word QZX"):
+        Solver(crossword, make_dictionary())
+
+
+def test_letter_outside_every_slot(write_grid, make_dictionary):
+    # the lone cell isn't part of a slot, the file's letter there constrains nothing
+    crossword = Crossword(write_grid(["___", "_#_", "___", "###", "Z##"]))
+    solver = Solver(crossword, make_dictionary())
+    assert solver.count_solutions() == len(brute_force_fills(crossword, WORDS))
+    with pytest.raises(ValueError, match="not part of any slot"):
+        solver.apply_letters({(4, 0): "Z"})
+
+
+def test_grid_cache_letters(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    cache = GridCache(fast_dict)
+    path = write_grid(RING)
+    letters = {(0, 0): "B", (2, 2): "T"}
+    expected = fills_with(Crossword(path), letters)
+
+    # the cached entry is made once and shared, the letters stay with each solver
+    assert {as_key(fill) for fill in cache.solver(path, letters=letters).solutions()} == expected
+    assert cache.solver(path).count_solutions() == len(brute_force_fills(Crossword(path), WORDS))
+    assert {as_key(fill) for fill in cache.solver(path, letters=letters).solutions()} == expected
+    assert cache.info()["misses"] == 1
@@ -0,0 +1,74 @@
+import pytest
+
+from tests.dictionary import FastDictionary
+from tests.models import Crossword
+from tests.solver import Solver
+
+from helpers import sample_words
+
+GRID_3X3 = ["___", "___", "___"]
+
+LINES = sample_words(3, 150, seed=4) + sample_words(4, 80, seed=1) + sample_words(5, 80, seed=2)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="backend"):
+        FastDictionary("words.txt", backend="pandas")
+
+
+def test_numpy_backend_needs_numpy(tmp_path):
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        path = tmp_path / "words.txt"
+        path.write_text("ABC\n")
+        with pytest.raises(ImportError):
+            FastDictionary(str(path), backend="numpy")
+    else:
+        pytest.skip("numpy is installed")
+
+
+@pytest.fixture
+def backends(tmp_path):
+    '''(bitset dictionary, numpy dictionary) over the same words'''
+    pytest.importorskip("numpy")
+    path = tmp_path / "words.txt"
+    path.write_text("\n".join(LINES) + "\n")
+    return FastDictionary(str(path)), FastDictionary(str(path), backend="numpy")
+
+
+def test_masks_match_the_bitset_build(backends):
+    bitset, matrix = backends
+    for length in bitset.lengths():
+        assert matrix.words_of(length) == bitset.words_of(length)
+        for index in range(length):
+            assert list(matrix.position_masks(length, index).items()) == list(
+                bitset.position_masks(length, index).items()
+            )
+
+
+@pytest.mark.parametrize("lcv_top_k", [None, 5])
+def test_lcv_order_matches_python(backends, write_grid, monkeypatch, lcv_top_k):
+    bitset, matrix = backends
+    monkeypatch.setattr(matrix.matrix, "LCV_MIN_WORDS", 0)
+    crossword = Crossword(write_grid(GRID_3X3))
+    runs = []
+    for fast_dict in backends:
+        solver = Solver(crossword, fast_dict, value_order="lcv", lcv_top_k=lcv_top_k)
+        assert solver.ac3()
+        orders = [solver.order_domain_values(var, dict()) for var in crossword.variable_list]
+        runs.append((orders, solver.count_solutions(), solver.nodes))
+    assert runs[0] == runs[1]
+
+
+def test_updates_reach_the_matrix(backends, monkeypatch):
+    bitset, matrix = backends
+    monkeypatch.setattr(matrix.matrix, "LCV_MIN_WORDS", 0)
+    for fast_dict in backends:
+        fast_dict.add_words(["QZX", "ZZZZ"])
+        fast_dict.remove_words(LINES[:3])
+    word_ids = list(range(len(bitset.words_of(3))))
+    histograms = [(0, {"Q": 5, "A": 2}), (2, {"X": 1})]
+    ranked = matrix.matrix.lcv_order(3, matrix.words_of(3), word_ids, histograms)
+    assert ranked[0] == matrix.words_of(3).index("QZX")
+    assert matrix.get_matches(3, {0: "Q"}) == bitset.get_matches(3, {0: "Q"})
@@ -0,0 +1,53 @@
+import os
+
+from tests import portfolio
+from tests.models import Crossword
+from tests.portfolio import solve_portfolio
+
+from helpers import is_fill
+
+RING = ["___", "_#_", "___"]
+
+CONFIGS = [
+    {"var_heuristic": "mrv", "value_order": "static", "seed": None},
+    {"var_heuristic": "dom/wdeg", "value_order": "random", "seed": 5},
+]
+
+
+def test_portfolio_finds_a_fill(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(RING))
+    outcome = solve_portfolio(crossword, fast_dict, configs=CONFIGS, workers=2)
+    assert outcome["status"] == "solved"
+    assert outcome["winner"] in CONFIGS
+    assert is_fill(crossword, outcome["assignment"], fast_dict)
+
+
+def test_portfolio_reports_worker_errors(write_grid, make_dictionary):
+    # the locked top row isn't a word, every worker's Solver raises ValueError
+    crossword = Crossword(write_grid(["QZX", "_#_", "___"]))
+    outcome = solve_portfolio(crossword, make_dictionary(), configs=CONFIGS, workers=2)
+    assert outcome["status"] == "error" and outcome["assignment"] is None
+    assert [entry["status"] for entry in outcome["workers"]] == ["error", "error"]
+    assert all("QZX" in entry["error"] for entry in outcome["workers"])
+
+
+def test_portfolio_error_in_one_worker(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(RING))
+    configs = [{"var_heuristic": "nonsense"}] + CONFIGS[:1]
+    outcome = solve_portfolio(crossword, fast_dict, configs=configs, workers=2)
+    assert outcome["status"] == "solved" and outcome["winner"] == CONFIGS[0]
+    assert outcome["workers"][0]["status"] == "error"
+    assert "ValueError" in outcome["workers"][0]["error"]
+
+
+def test_portfolio_notices_a_dead_worker(write_grid, make_dictionary, monkeypatch):
+    def die(*args, **kwargs):
+        os._exit(3)
+
+    # the workers fork off this process, so they see the patched Solver
+    monkeypatch.setattr(portfolio, "Solver", die)
+    outcome = solve_portfolio(Crossword(write_grid(RING)), make_dictionary(), configs=CONFIGS, workers=2)
+    assert outcome["status"] == "error"
+    assert all(entry["error"] == "worker exited with code 3" for entry in outcome["workers"])
@@ -0,0 +1,102 @@
+import pytest
+
+from tests.models import Crossword
+from tests.solver import Solver
+from tests.utils import iter_bits
+
+from helpers import WORDS, brute_force_fills, as_key, sample_words
+
+RING = ["___", "_#_", "___"]
+GRID_3X3 = ["___", "___", "___"]
+
+
+def fill_words(solver, fills):
+    '''every (var, word id) that is part of some fill'''
+    return {
+        (var, solver.fast_dict.words_of(var.length).index(word))
+        for fill in fills for var, word in fill.items()
+    }
+
+
+def passes_singleton_check(solver, var, word_id):
+    mark = solver.trail_mark()
+    solver._set_domain(var, 1 << word_id)
+    consistent = solver.ac3([(n, var) for n in solver.crossword.neighbors(var)])
+    solver.undo(mark)
+    return consistent
+
+
+@pytest.mark.parametrize("rows, words", [
+    (RING, WORDS),
+    (GRID_3X3, sample_words(3, 150, seed=4)),
+    (GRID_3X3, sample_words(3, 30, seed=10)),
+])
+def test_full_probe_is_sound_and_complete(write_grid, make_dictionary, rows, words):
+    crossword = Crossword(write_grid(rows))
+    fast_dict = make_dictionary(words)
+    solver = Solver(crossword, fast_dict)
+    assert solver.ac3()
+    before = {var: solver.domains[var] for var in crossword.variable_list}
+    # every fill of a plain search (checked against brute force in test_enumeration)
+    needed = fill_words(solver, Solver(crossword, fast_dict).solutions())
+
+    consistent = solver.probe()
+    if not consistent:
+        # singleton arc consistency can miss that there is no fill, it can't make one up
+        assert not needed
+        return
+    kept = {(var, word_id) for var in crossword.variable_list for word_id in iter_bits(solver.domains[var])}
+    # nothing that is part of a fill is dropped
+    assert needed <= kept
+    # every word left survives being assigned on its own (singleton arc consistency)
+    assert all(passes_singleton_check(solver, var, word_id) for var, word_id in kept)
+    removed = sum(before[var].bit_count() - solver.domains[var].bit_count() for var in before)
+    assert solver.probe_totals["removed"] == len(solver.probe_removed) <= removed
+
+
+def test_probe_totals(write_grid, make_dictionary):
+    crossword = Crossword(write_grid(GRID_3X3))
+    fast_dict = make_dictionary(sample_words(3, 150, seed=4))
+    full = Solver(crossword, fast_dict)
+    assert full.ac3() and full.probe()
+    assert full.probe_totals["passes"] == 1
+    assert full.probe_totals["probes"] >= full.probe_totals["removed"] == len(full.probe_removed)
+
+    solver = Solver(crossword, fast_dict)
+    assert solver.ac3()
+    passes = 0
+    while True:
+        tried = solver.probe_totals["probes"]
+        assert solver.probe(limit=25)
+        passes += 1
+        assert solver.probe_totals["passes"] == passes
+        if solver.probe_totals["probes"] - tried < 25:
+            break
+        assert solver.probe_totals["probes"] - tried == 25
+    # limited passes carry on where the last one stopped, they end where one full pass does
+    assert solver.domains == full.domains
+    assert solver.probe_totals["removed"] == len(solver.probe_removed)
+    assert solver.probe() and solver.probe_totals["removed"] == full.probe_totals["removed"]
+
+
+@pytest.mark.parametrize("options", [
+    dict(probe_limit=None),
+    dict(probe_limit=5),
+    dict(probe_limit=5, restarts="luby", restart_base=4, seed=1),
+])
+def test_search_with_probing_finds_every_fill(write_grid, make_dictionary, options):
+    crossword = Crossword(write_grid(RING))
+    expected = {as_key(fill) for fill in brute_force_fills(crossword, WORDS)}
+    solver = Solver(crossword, make_dictionary(), **options)
+    assert {as_key(fill) for fill in solver.solutions()} == expected
+    assert solver.probe_totals["passes"] >= 1
+
+
+def test_probing_proves_unsatisfiable(write_grid, make_dictionary):
+    crossword = Crossword(write_grid(GRID_3X3))
+    fast_dict = make_dictionary(sample_words(3, 20, seed=4))
+    # arc consistency alone can't tell, a probe can
+    assert Solver(crossword, fast_dict).ac3()
+    solver = Solver(crossword, fast_dict, probe_limit=None)
+    assert solver.solve() is None
+    assert solver.status == "unsatisfiable" and solver.nodes == 0
@@ -0,0 +1,45 @@
+from itertools import islice
+
+import pytest
+
+from tests import restarts
+from tests.models import Crossword
+from tests.solver import Solver
+
+from helpers import WORDS, brute_force_fills, as_key, is_fill, sample_words
+
+GRID_3X3 = ["___", "___", "___"]
+
+
+def test_schedules():
+    assert [restarts.luby(i) for i in range(1, 16)] == [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+    assert list(islice(restarts.cutoffs("luby", 10), 7)) == [10, 10, 20, 10, 10, 20, 40]
+    assert list(islice(restarts.cutoffs("geometric", 10, 2), 4)) == [10, 20, 40, 80]
+    with pytest.raises(ValueError):
+        next(restarts.cutoffs("linear"))
+
+
+@pytest.mark.parametrize("schedule", restarts.SCHEDULES)
+@pytest.mark.parametrize("seed", range(3))
+def test_restarted_search_finds_a_fill(write_grid, make_dictionary, schedule, seed):
+    fast_dict = make_dictionary(sample_words(3, 150, seed=4))
+    crossword = Crossword(write_grid(GRID_3X3))
+    solver = Solver(crossword, fast_dict, restarts=schedule, restart_base=1, seed=seed, nogood_limit=100)
+    assert is_fill(crossword, solver.solve(), fast_dict)
+    assert solver.restarts > 0
+
+
+def test_restarted_search_proves_unsatisfiable(write_grid, make_dictionary):
+    words = sample_words(3, 40, seed=1)
+    crossword = Crossword(write_grid(GRID_3X3))
+    assert not brute_force_fills(crossword, words)
+    solver = Solver(crossword, make_dictionary(words), restarts="luby", restart_base=1, seed=0)
+    assert solver.solve() is None
+    assert solver.status == "unsatisfiable"
+
+
+def test_restarted_enumeration_is_complete(write_grid, make_dictionary):
+    crossword = Crossword(write_grid(["___", "_#_", "___"]))
+    expected = {as_key(fill) for fill in brute_force_fills(crossword, WORDS)}
+    solver = Solver(crossword, make_dictionary(), restarts="geometric", restart_base=3, seed=2)
+    assert {as_key(fill) for fill in solver.solutions()} == expected
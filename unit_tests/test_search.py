@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from tests.models import Crossword
+from tests.search import Search
+from tests.solver import Solver
+
+from helpers import WORDS, brute_force_fills, as_key, sample_words
+
+RING = ["___", "_#_", "___"]
+GRID_3X3 = ["___", "___", "___"]
+
+OPTIONS = [
+    {},
+    {"value_order": "lcv"},
+    {"value_order": "random", "seed": 4},
+    {"var_heuristic": "dom/wdeg", "nogood_limit": 50},
+    {"var_heuristic": "dom/wdeg", "restarts": "luby", "restart_base": 1, "seed": 2},
+]
+
+
+@pytest.mark.parametrize("options", OPTIONS)
+def test_checkpoint_every_node_reproduces_the_run(write_grid, make_dictionary, options):
+    # a word list this search has to backtrack (and restart) through
+    fast_dict = make_dictionary(sample_words(3, 150, seed=4))
+    crossword = Crossword(write_grid(GRID_3X3))
+
+    straight = Solver(crossword, fast_dict, **options)
+    reference = Search(straight).run()
+
+    solver = Solver(crossword, fast_dict, **options)
+    search = Search(solver)
+    pauses = 0
+    while search.run(max_nodes=1) is None and search.status == "paused":
+        snapshot = json.loads(json.dumps(search.checkpoint()))
+        # a frame holds the mask of the words it has left, not a list of them
+        assert all(isinstance(frame[1], str) for frame in snapshot["frames"])
+        solver = Solver(crossword, fast_dict, **options)
+        search = Search.restore(solver, snapshot)
+        pauses += 1
+
+    assert pauses > 0 and solver.backtracks > 0
+    assert search.status == ("solved" if reference is not None else "exhausted")
+    assert (solver.nodes, solver.backtracks) == (straight.nodes, straight.backtracks)
+    if reference is not None:
+        assert as_key(search.assignment) == as_key(reference)
+
+
+def test_resumed_enumeration_finds_every_fill(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(RING))
+    expected = {as_key(fill) for fill in brute_force_fills(crossword, WORDS)}
+
+    found = set()
+    solver = Solver(crossword, fast_dict)
+    search = Search(solver)
+    while search.status != "exhausted":
+        assignment = search.run(max_nodes=3)
+        if assignment is not None:
+            found.add(as_key(assignment))
+        snapshot = json.loads(json.dumps(search.checkpoint()))
+        solver = Solver(crossword, fast_dict)
+        search = Search.restore(solver, snapshot)
+    assert found == expected
@@ -0,0 +1,40 @@
+from tests.models import Crossword
+from tests.solver import Solver
+
+from helpers import WORDS, brute_force_fills, as_key, is_fill
+
+# four slots round a block, corners shared
+RING = ["___", "_#_", "___"]
+GRID_3X3 = ["___", "___", "___"]
+
+
+def test_solve_finds_a_fill(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(RING))
+    solver = Solver(crossword, fast_dict)
+    assignment = solver.solve()
+    assert solver.status == "solved"
+    assert is_fill(crossword, assignment, fast_dict)
+
+
+def test_solver_can_be_reused_after_a_fill(write_grid, make_dictionary):
+    fast_dict = make_dictionary()
+    crossword = Crossword(write_grid(RING))
+    expected = len(brute_force_fills(crossword, WORDS))
+    solver = Solver(crossword, fast_dict)
+
+    first = solver.solve()
+    second = solver.solve()
+    assert first is not None and as_key(first) == as_key(second)
+    assert not solver.levels and not solver.decisions and not solver.order.assigned
+
+    assert solver.count_solutions() == expected
+    assert solver.status == "exhausted"
+    assert as_key(solver.solve()) == as_key(first)
+
+
+def test_unsatisfiable_grid(write_grid, make_dictionary):
+    fast_dict = make_dictionary(["ABC", "DEF"])
+    solver = Solver(Crossword(write_grid(GRID_3X3)), fast_dict)
+    assert solver.solve() is None
+    assert solver.status == "unsatisfiable"
@@ -0,0 +1,68 @@
+import os
+
+from tests.dictionary import FastDictionary
+from tests.models import Crossword
+from tests.wordlists import WordListReader, iter_words, normalise
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# words.csv: header, a phrase, a bad length column and a repeat
+# scored.txt: word;score with a repeated word, a bad score and an empty word
+# plain.txt: one word per line, blank and letterless lines
+# compressed.dat: a gzipped word;score list, the name doesn't say so
+SOURCES = ["words.csv", "scored.txt", "plain.txt", "compressed.dat"]
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+def test_normalise():
+    assert normalise("rock 'n' roll") == "ROCKNROLL"
+    assert normalise("Apple") == "APPLE"
+    assert normalise("--") == ""
+
+
+def test_each_format():
+    assert list(iter_words(fixture("words.csv"))) == [
+        ("APPLE", None), ("ROCKNROLL", None), ("BANANA", None), ("CHERRY", None), ("APPLE", None),
+    ]
+    assert list(iter_words(fixture("scored.txt"))) == [
+        ("APPLE", 7.5), ("CHERRY", 2.0), ("CHERRY", 9.0), ("DATE", 1.0),
+    ]
+    assert list(iter_words(fixture("plain.txt"))) == [("BANANA", None), ("FIG", None), ("DATE", None)]
+    assert list(iter_words(fixture("compressed.dat"))) == [("GRAPE", 4.0), ("FIG", None), ("APPLE", 8.0)]
+
+
+def test_sources_are_merged():
+    reader = WordListReader()
+    for name in SOURCES:
+        reader.read(fixture(name))
+
+    assert reader.buckets == {
+        3: {"FIG"}, 4: {"DATE"}, 5: {"APPLE", "GRAPE"}, 6: {"BANANA", "CHERRY"}, 9: {"ROCKNROLL"},
+    }
+    # the best score any source gives wins, unscored words have none
+    assert reader.scores == {"APPLE": 8.0, "CHERRY": 9.0, "DATE": 1.0, "GRAPE": 4.0}
+    stats = reader.stats()
+    assert (stats["sources"], stats["lines"], stats["words"]) == (4, 21, 7)
+    assert (stats["duplicates"], stats["skipped"]) == (8, 6)
+
+
+def test_dictionary_from_several_lists():
+    fast_dict = FastDictionary([fixture(name) for name in SOURCES])
+    assert fast_dict.words_of(5) == ["APPLE", "GRAPE"]
+    assert fast_dict.words_of(6) == ["CHERRY", "BANANA"]
+    assert fast_dict.word_score(6, "CHERRY") == 9.0
+    assert fast_dict.word_score(6, "BANANA") == FastDictionary.DEFAULT_SCORE
+    assert fast_dict.load_stats["words"] == 7
+
+    # a single gzipped list is read like any other
+    assert FastDictionary(fixture("compressed.dat")).words_of(5) == ["APPLE", "GRAPE"]
+
+
+def test_crossword_words_file(tmp_path):
+    grid = tmp_path / "grid.txt"
+    grid.write_text("___\n")
+    crossword = Crossword(str(grid), fixture("plain.txt"))
+    assert crossword.words == {"BANANA", "FIG", "DATE"}